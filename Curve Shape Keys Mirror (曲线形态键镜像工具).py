@@ -1,7 +1,7 @@
 bl_info = {
     "name": "Curve Shape Keys Mirror (曲线形态键镜像工具)",
     "author": "vvenhongfei+GPT-5",
-    "version": (1, 0, 0),
+    "version": (1, 1, 0),
     "blender": (4, 5, 2),
     "location": "3D View > N Panel > Curve Mirror SK",
     "description": "一键镜像曲线及其所有形态键，修复镜像后方向/手柄问题；支持 Bezier/Poly/NURBS。",
@@ -9,8 +9,16 @@ bl_info = {
 }
 
 import bpy
-from mathutils import Vector
+from mathutils import Vector, kdtree
 import math  # 导入math模块用于数学计算
+import hashlib
+import uuid
+from typing import NamedTuple
+
+try:
+    import numpy as np
+except ImportError:  # 自编译的 Blender 可能没有 numpy，此时回退逐点循环
+    np = None
 
 AXIS_MAP = {
     'X': Vector((-1.0, 1.0, 1.0)),
@@ -36,80 +44,353 @@ def swap_bezier_handles(bp):
     bp.handle_left = hr
     bp.handle_right = hl
 
-def foreach_curve_point(spline, keyblock_data, start_index):
-    """迭代一个 spline 的点，并返回 (索引, data_point, 类型字符串)"""
-    if spline.type == 'BEZIER':
-        for i, _p in enumerate(spline.bezier_points):
-            yield start_index + i, keyblock_data[start_index + i], 'BEZIER'
-        return start_index + len(spline.bezier_points)
-    else:
-        # POLY 或 NURBS
-        for i, _p in enumerate(spline.points):
-            yield start_index + i, keyblock_data[start_index + i], 'POINT'
-        return start_index + len(spline.points)
-
-def mirror_keyblock(curve, keyblock, axis='X', swap_handles=False):
-    """对某个形态键（KeyBlock）的所有点进行镜像"""
-    idx = 0
+class CurveLayout(NamedTuple):
+    """
+    曲线的 spline 布局（只读）：形态键数据按 spline 顺序连续存放，每个形态键的布局都相同，
+    因此每条曲线只计算一次，镜像与反转的所有形态键共用
+    """
+    offsets: tuple        # 每条 spline 在形态键数据中的起始索引
+    counts: tuple         # 每条 spline 的点数
+    types: tuple          # 每条 spline 的类型（'BEZIER' / 'POLY' / 'NURBS'）
+    bezier_ranges: tuple  # Bezier spline 的 (start, stop)
+    point_ranges: tuple   # Poly/NURBS spline 的 (start, stop)
+    total: int            # 点总数，应与每个形态键的 len(data) 一致
+    reverse_perm: object  # 反转全部 spline 点序的索引数组（无 numpy 时为 None）
+
+    @property
+    def uniform_bezier(self):
+        """全部为 Bezier 返回 True，全部为 Poly/NURBS 返回 False，混合（无法整体 foreach）返回 None"""
+        if not self.point_ranges:
+            return True
+        if not self.bezier_ranges:
+            return False
+        return None
+
+def build_curve_layout(curve):
+    """遍历一次 curve.splines，生成 CurveLayout"""
+    offsets, counts, types, bezier_ranges, point_ranges = [], [], [], [], []
+    start = 0
     for spline in curve.splines:
-        if spline.type == 'BEZIER':
-            for _ in spline.bezier_points:
-                bp = keyblock.data[idx]
-                bp.co = mirror_vec(bp.co, axis)
-                bp.handle_left  = mirror_vec(bp.handle_left, axis)
-                bp.handle_right = mirror_vec(bp.handle_right, axis)
-                if swap_handles:
-                    swap_bezier_handles(bp)
-                # 修正 Tilt：旋转-180度（使用弧度制）
-                try:
-                    bp.tilt -= math.pi  # 减去π弧度（即-180度）
-                except AttributeError:
-                    pass
-                idx += 1
-        else:
-            for _ in spline.points:
-                pp = keyblock.data[idx]
-                pp.co = mirror_vec(pp.co, axis)
-                # 修正 Tilt：旋转-180度（使用弧度制）
-                try:
-                    pp.tilt -= math.pi  # 减去π弧度（即-180度）
-                except AttributeError:
-                    pass
-                idx += 1
-
-def reverse_spline_direction_for_all_keys(curve, keyblocks):
-    """反转每条 spline 的点序，确保一致性"""
+        bezier = spline.type == 'BEZIER'
+        count = len(spline.bezier_points) if bezier else len(spline.points)
+        offsets.append(start)
+        counts.append(count)
+        types.append(spline.type)
+        (bezier_ranges if bezier else point_ranges).append((start, start + count))
+        start += count
+    reverse_perm = None
+    if np is not None:
+        # 每段 [start, stop) 倒序拼接；形态键数组按该索引取值（arr[perm]）即可一次反转所有 spline
+        reverse_perm = np.arange(start, dtype=np.int64)
+        for a, b in bezier_ranges + point_ranges:
+            reverse_perm[a:b] = reverse_perm[a:b][::-1]
+        reverse_perm.flags.writeable = False
+    return CurveLayout(tuple(offsets), tuple(counts), tuple(types),
+                       tuple(bezier_ranges), tuple(point_ranges), start, reverse_perm)
+
+def layout_mismatches(layout, keyblocks):
+    """返回点数与布局不一致的形态键名称（数据已损坏或曲线拓扑在形态键之后被修改）"""
+    return [kb.name for kb in keyblocks if len(kb.data) != layout.total]
+
+def foreach_curve_point(layout, keyblock_data):
+    """按布局迭代形态键的点，返回 (索引, data_point, 类型字符串)"""
+    for start, count, spline_type in zip(layout.offsets, layout.counts, layout.types):
+        kind = 'BEZIER' if spline_type == 'BEZIER' else 'POINT'  # POLY 或 NURBS
+        for i in range(start, start + count):
+            yield i, keyblock_data[i], kind
+
+def _read_keyblock_attr(keyblock, attr, count, width):
+    """一次 foreach_get 读出形态键所有点的某个属性，返回 float32[count, width]（width 为 1 时为一维）"""
+    buf = np.empty(count * width, dtype=np.float32)
+    keyblock.data.foreach_get(attr, buf)
+    return buf.reshape(count, width) if width > 1 else buf
+
+def mirror_keyblock_numpy(keyblock, axis='X', swap_handles=False, bezier=True):
+    """
+    向量化镜像：co / handle_left / handle_right / tilt 各一次 foreach_get 读出，
+    NumPy 乘轴符号、减 π，整体交换左右手柄后每个属性一次 foreach_set 写回
+    bezier: 形态键的点全部来自 Bezier spline（有手柄）；False 表示全部为 Poly/NURBS 点
+    """
+    count = len(keyblock.data)
+    if not count:
+        return
+    sign = np.array(tuple(AXIS_MAP[axis]), dtype=np.float32)
+    # 先读出全部属性再写回，读取失败时形态键保持原样
+    co = _read_keyblock_attr(keyblock, "co", count, 3)
+    tilt = _read_keyblock_attr(keyblock, "tilt", count, 1)
+    if bezier:
+        left = _read_keyblock_attr(keyblock, "handle_left", count, 3)
+        right = _read_keyblock_attr(keyblock, "handle_right", count, 3)
+
+    co *= sign
+    # 修正 Tilt：旋转-180度（使用弧度制）
+    tilt -= np.float32(math.pi)
+    keyblock.data.foreach_set("co", co.ravel())
+    keyblock.data.foreach_set("tilt", tilt)
+    if bezier:
+        left *= sign
+        right *= sign
+        if swap_handles:
+            left, right = right, left
+        keyblock.data.foreach_set("handle_left", left.ravel())
+        keyblock.data.foreach_set("handle_right", right.ravel())
+
+def _check_layout(layout, keyblock):
+    if len(keyblock.data) != layout.total:
+        raise ValueError(f"形态键 {keyblock.name} 的点数 {len(keyblock.data)} 与曲线的点数 {layout.total} 不一致")
+
+def mirror_keyblock(curve, keyblock, axis='X', swap_handles=False, layout=None):
+    """对某个形态键（KeyBlock）的所有点进行镜像；layout 为 None 时现场计算"""
+    if layout is None:
+        layout = build_curve_layout(curve)
+    _check_layout(layout, keyblock)
+    if np is not None and layout.uniform_bezier is not None:
+        try:
+            mirror_keyblock_numpy(keyblock, axis, swap_handles, layout.uniform_bezier)
+            return
+        except (AttributeError, TypeError, RuntimeError):
+            pass  # foreach 读取失败（例如旧版本缺少 tilt）时回退逐点循环
+    for _idx, p, kind in foreach_curve_point(layout, keyblock.data):
+        p.co = mirror_vec(p.co, axis)
+        if kind == 'BEZIER':
+            p.handle_left  = mirror_vec(p.handle_left, axis)
+            p.handle_right = mirror_vec(p.handle_right, axis)
+            if swap_handles:
+                swap_bezier_handles(p)
+        # 修正 Tilt：旋转-180度（使用弧度制）
+        try:
+            p.tilt -= math.pi  # 减去π弧度（即-180度）
+        except AttributeError:
+            pass
+
+def reverse_keyblock_numpy(keyblock, perm, bezier=True):
+    """
+    向量化反转：各属性一次 foreach_get 读出，按 perm 重排后一次 foreach_set 写回
+    Bezier 点反转后前进方向相反，原来的右手柄成为新的左手柄，因此左右手柄数组在重排时互换
+    """
+    count = len(keyblock.data)
+    if not count:
+        return
+    co = _read_keyblock_attr(keyblock, "co", count, 3)
+    tilt = _read_keyblock_attr(keyblock, "tilt", count, 1)
+    radius = _read_keyblock_attr(keyblock, "radius", count, 1)
+    if bezier:
+        left = _read_keyblock_attr(keyblock, "handle_left", count, 3)
+        right = _read_keyblock_attr(keyblock, "handle_right", count, 3)
+
+    keyblock.data.foreach_set("co", co[perm].ravel())
+    keyblock.data.foreach_set("tilt", tilt[perm])
+    keyblock.data.foreach_set("radius", radius[perm])
+    if bezier:
+        keyblock.data.foreach_set("handle_left", right[perm].ravel())
+        keyblock.data.foreach_set("handle_right", left[perm].ravel())
+
+def _reverse_keyblock_loop(layout, kb):
+    """逐点反转（混合类型曲线或无 numpy 时的回退）；先把每段的值复制出来再倒序写回"""
+    for start, count, spline_type in zip(layout.offsets, layout.counts, layout.types):
+        bezier = spline_type == 'BEZIER'
+        points = [kb.data[start + i] for i in range(count)]
+        segment = [(p.co.copy(), getattr(p, "tilt", None), getattr(p, "radius", None),
+                    p.handle_left.copy() if bezier else None,
+                    p.handle_right.copy() if bezier else None) for p in points]
+        segment.reverse()
+        for p, (co, tilt, radius, handle_left, handle_right) in zip(points, segment):
+            p.co = co
+            if tilt is not None:
+                p.tilt = tilt
+            if radius is not None:
+                p.radius = radius
+            if bezier:
+                # 方向反转后左右手柄互换
+                p.handle_left = handle_right
+                p.handle_right = handle_left
+
+def reverse_spline_direction_for_all_keys(curve, keyblocks, layout=None):
+    """反转每条 spline 的点序，确保一致性；layout 为 None 时现场计算"""
+    if layout is None:
+        layout = build_curve_layout(curve)
     for kb in keyblocks:
-        idx = 0
-        for sp in curve.splines:
-            if sp.type == 'BEZIER':
-                count = len(sp.bezier_points)
-                segment = [kb.data[idx + i].copy() for i in range(count)]
-                segment.reverse()
-                for i in range(count):
-                    kb.data[idx + i].co = segment[i].co
-                    try:
-                        kb.data[idx + i].tilt = segment[i].tilt
-                    except AttributeError:
-                        pass
-                    kb.data[idx + i].handle_left  = segment[i].handle_left
-                    kb.data[idx + i].handle_right = segment[i].handle_right
-                idx += count
-            else:
-                count = len(sp.points)
-                segment = [kb.data[idx + i].copy() for i in range(count)]
-                segment.reverse()
-                for i in range(count):
-                    kb.data[idx + i].co = segment[i].co
-                    try:
-                        kb.data[idx + i].tilt = segment[i].tilt
-                    except AttributeError:
-                        pass
-                idx += count
+        _check_layout(layout, kb)
+    for kb in keyblocks:
+        if np is not None and layout.uniform_bezier is not None:
+            try:
+                reverse_keyblock_numpy(kb, layout.reverse_perm, layout.uniform_bezier)
+                continue
+            except (AttributeError, TypeError, RuntimeError):
+                pass  # foreach 读取失败时回退逐点循环
+        _reverse_keyblock_loop(layout, kb)
+
+# ------------------------------
+# 拓扑镜像（对称曲线左右互换形态键，相当于网格的“镜像形态键（拓扑）”）
+# ------------------------------
+_KEYBLOCK_VECTOR_ATTRS = ("co", "handle_left", "handle_right")
+_KEYBLOCK_SCALAR_ATTRS = ("tilt", "radius")
+
+def read_keyblock_arrays(layout, keyblock):
+    """
+    读出形态键全部点的 co / handle_left / handle_right / tilt / radius，返回 {属性: float32 数组}
+    Poly/NURBS 点没有手柄，手柄数组以 co 填充；单一类型曲线走 foreach_get，混合类型逐点读取
+    """
+    count = layout.total
+    bezier = layout.uniform_bezier
+    if bezier is not None:
+        arrays = {attr: _read_keyblock_attr(keyblock, attr, count, 1) for attr in _KEYBLOCK_SCALAR_ATTRS}
+        arrays["co"] = _read_keyblock_attr(keyblock, "co", count, 3)
+        for attr in ("handle_left", "handle_right"):
+            arrays[attr] = _read_keyblock_attr(keyblock, attr, count, 3) if bezier else arrays["co"].copy()
+        return arrays
+    arrays = {attr: np.empty((count, 3), dtype=np.float32) for attr in _KEYBLOCK_VECTOR_ATTRS}
+    arrays.update({attr: np.empty(count, dtype=np.float32) for attr in _KEYBLOCK_SCALAR_ATTRS})
+    for i, p, kind in foreach_curve_point(layout, keyblock.data):
+        arrays["co"][i] = p.co[:3]
+        handles = (p.handle_left, p.handle_right) if kind == 'BEZIER' else (p.co, p.co)
+        arrays["handle_left"][i] = handles[0][:3]
+        arrays["handle_right"][i] = handles[1][:3]
+        arrays["tilt"][i] = p.tilt
+        arrays["radius"][i] = p.radius
+    return arrays
+
+def write_keyblock_arrays(layout, keyblock, arrays):
+    """read_keyblock_arrays 的逆操作；Poly/NURBS 点的手柄数组被忽略"""
+    bezier = layout.uniform_bezier
+    if bezier is not None:
+        attrs = _KEYBLOCK_VECTOR_ATTRS if bezier else ("co",)
+        for attr in attrs + _KEYBLOCK_SCALAR_ATTRS:
+            keyblock.data.foreach_set(attr, arrays[attr].ravel())
+        return
+    for i, p, kind in foreach_curve_point(layout, keyblock.data):
+        p.co = arrays["co"][i]
+        if kind == 'BEZIER':
+            p.handle_left = arrays["handle_left"][i]
+            p.handle_right = arrays["handle_right"][i]
+        p.tilt = float(arrays["tilt"][i])
+        p.radius = float(arrays["radius"][i])
+
+# curve.as_pointer() -> (轴, 容差, 基础形态坐标摘要, 伙伴索引数组)；基础形态改变时摘要不同，自动重建
+_partner_map_cache = {}
+
+def build_partner_map(basis_co, axis='X', tolerance=1e-4):
+    """
+    用 KD-tree 为每个点找到基础形态中位于镜像位置的伙伴点：建树 O(n log n)，每个点查询 O(log n)
+    返回 int64[n]：伙伴索引，容差内找不到时为 -1；位于镜像平面上的点伙伴是自己
+    """
+    count = len(basis_co)
+    tree = kdtree.KDTree(count)
+    for i, co in enumerate(basis_co):
+        tree.insert(co, i)
+    tree.balance()
+    mirrored = basis_co * np.array(tuple(AXIS_MAP[axis]), dtype=np.float32)
+    partners = np.full(count, -1, dtype=np.int64)
+    for i, co in enumerate(mirrored):
+        _co, index, dist = tree.find(co)
+        if index is not None and dist <= tolerance:
+            partners[i] = index
+    return partners
+
+def get_partner_map(curve, basis_co, axis='X', tolerance=1e-4):
+    """按曲线缓存伙伴映射：同一曲线镜像多个形态键时只建一次 KD-tree"""
+    digest = hash(basis_co.tobytes())
+    cached = _partner_map_cache.get(curve.as_pointer())
+    if cached is not None and cached[:3] == (axis, tolerance, digest):
+        return cached[3]
+    partners = build_partner_map(basis_co, axis, tolerance)
+    partners.flags.writeable = False
+    _partner_map_cache[curve.as_pointer()] = (axis, tolerance, digest, partners)
+    return partners
+
+def topology_mirror_arrays(arrays, relative, partners, axis='X'):
+    """
+    计算拓扑镜像后的形态：每个点取伙伴点相对参考形态的偏移，按轴翻转后加到自己的参考位置上
+    co 与手柄的偏移乘轴符号，tilt 的偏移取反（扭转方向随镜像反转），radius 偏移直接复制；
+    没有伙伴的点保持原值
+    """
+    sign = np.array(tuple(AXIS_MAP[axis]), dtype=np.float32)
+    matched = partners >= 0
+    src = partners[matched]
+    result = {}
+    for attr, values in arrays.items():
+        out = values.copy()
+        offset = values[src] - relative[attr][src]
+        if attr in _KEYBLOCK_VECTOR_ATTRS:
+            offset *= sign
+        elif attr == "tilt":
+            offset = -offset
+        out[matched] = relative[attr][matched] + offset
+        result[attr] = out
+    return result
+
+def _mirrored_key_name(name):
+    """L/R 命名的形态键（smile.L）翻转为对侧名称，否则追加 _MIR；同名形态键已存在时由调用方写入该形态键"""
+    flipped = bpy.utils.flip_name(name)
+    if flipped == name:
+        flipped = name + "_MIR"
+    return flipped
+
+def _is_mirror_result(name, positions):
+    """
+    形态键本身是否为另一个形态键的镜像结果：smile_MIR 的原名 smile 存在，
+    或 L/R 对侧名称的形态键排在它前面（先建的一侧视为原始形态键）
+    """
+    if name.endswith("_MIR") and name[:-4] in positions:
+        return True
+    flipped = bpy.utils.flip_name(name)
+    return flipped != name and positions.get(flipped, len(positions)) < positions[name]
+
+# ------------------------------
+# 增量镜像：镜像副本记录每个源形态键的内容校验和，再次执行时只重新镜像有变化的形态键
+# ------------------------------
+# 源与副本之间用同一个 uuid 字符串关联：ID 引用属性会计入用户数，互相引用时两边都永远不会成为孤立数据
+MIRROR_LINK_PROP = "cmsk_link"                # 源曲线数据：镜像链接 ID
+MIRROR_SOURCE_PROP = "cmsk_source"            # 镜像副本：所属源的镜像链接 ID
+MIRROR_SOURCE_NAME_PROP = "cmsk_source_name"  # 镜像副本：源曲线数据名，Shift+D 复制源后链接 ID 重复时用来区分
+MIRROR_SETTINGS_PROP = "cmsk_settings"        # 镜像副本：生成时的轴/手柄/反转设置与 spline 布局签名
+MIRROR_CHECKSUMS_PROP = "cmsk_checksums"      # 镜像副本：{源形态键名: 内容校验和}
+_MIRROR_PROPS = (MIRROR_LINK_PROP, MIRROR_SOURCE_PROP, MIRROR_SOURCE_NAME_PROP,
+                 MIRROR_SETTINGS_PROP, MIRROR_CHECKSUMS_PROP)
+
+def keyblock_checksum(arrays):
+    """read_keyblock_arrays 结果的内容校验和（跨会话稳定，不使用 Python 的随机化 hash）"""
+    h = hashlib.blake2b(digest_size=16)
+    for attr in sorted(arrays):
+        h.update(arrays[attr].tobytes())
+    return h.hexdigest()
+
+def mirror_settings_signature(layout, axis, swap_handles, reverse_direction):
+    """设置或 spline 布局任一变化时签名不同，此时增量结果无效，需要完整重新镜像"""
+    topology = hashlib.blake2b(repr((layout.counts, layout.types)).encode(), digest_size=8).hexdigest()
+    return f"{axis}|{int(swap_handles)}|{int(reverse_direction)}|{topology}"
+
+def _own_mirror(src_data):
+    """
+    在 bpy.data.curves 中查找 src_data 自己的镜像副本数据；Shift+D 复制源对象时 cmsk_link 会被一并复制，
+    多条曲线共用同一链接 ID 时只认副本记录的源名称与 src_data 一致的那一条，否则返回 None
+    """
+    link = src_data.get(MIRROR_LINK_PROP)
+    if not isinstance(link, str):
+        return None
+    owners = 0
+    mirrors = []
+    for curve in bpy.data.curves:
+        if curve.get(MIRROR_LINK_PROP) == link:
+            owners += 1
+        if curve.get(MIRROR_SOURCE_PROP) == link:
+            mirrors.append(curve)
+    if owners > 1:
+        mirrors = [m for m in mirrors if m.get(MIRROR_SOURCE_NAME_PROP) == src_data.name_full]
+    return mirrors[0] if mirrors else None
+
+def _objects_by_curve(objects):
+    """curve.as_pointer() -> [objects 中使用该曲线数据的对象]"""
+    users = {}
+    for ob in objects:
+        if ob.type == 'CURVE' and ob.data is not None:
+            users.setdefault(ob.data.as_pointer(), []).append(ob)
+    return users
 
 class CURVE_OT_mirror_shapekeys(bpy.types.Operator):
     bl_idname = "curve.mirror_shapekeys"
     bl_label = "镜像曲线形态键"
+    bl_description = "镜像所有选中曲线对象的形态键；共享曲线数据的对象只处理一次，整体只产生一个撤销步骤"
     bl_options = {'REGISTER', 'UNDO'}
 
     axis: bpy.props.EnumProperty(
@@ -134,59 +415,301 @@ class CURVE_OT_mirror_shapekeys(bpy.types.Operator):
         description="对所有形态键统一反转每条曲线的点序；仅在方向仍有问题时启用",
         default=False
     )
+    incremental: bpy.props.BoolProperty(
+        name="增量更新已有镜像副本",
+        description="勾选：已有 _MIR 副本时就地更新它（设置未变时只重新镜像内容有变化的形态键，否则整体重新镜像）；"
+                    "不勾选：总是新建镜像副本，不改动已有副本",
+        default=True
+    )
+
+    def _mirror_data(self, curve, layout):
+        """镜像一个曲线数据块的全部形态键，返回形态键数量"""
+        blocks = list(curve.shape_keys.key_blocks)
+        for kb in blocks:
+            mirror_keyblock(curve, kb,
+                            axis=self.axis,
+                            swap_handles=self.swap_handles,
+                            layout=layout)
+
+        # 高级：反转每条曲线方向
+        if self.reverse_direction:
+            reverse_spline_direction_for_all_keys(curve, blocks, layout=layout)
+        return len(blocks)
+
+    def _update_mirror(self, src_data, dst_data, layout, checksums):
+        """
+        增量更新：逐个计算源形态键的校验和，与副本记录的不同时把源数据写入副本对应的形态键再镜像；
+        checksums 收集新的校验和，返回重新镜像的形态键数量
+        """
+        stored = dst_data.get(MIRROR_CHECKSUMS_PROP) or {}
+        dst_blocks = dst_data.shape_keys.key_blocks
+        changed = []
+        for kb in src_data.shape_keys.key_blocks:
+            arrays = read_keyblock_arrays(layout, kb)
+            digest = checksums[kb.name] = keyblock_checksum(arrays)
+            if stored.get(kb.name) == digest:
+                continue
+            dst_kb = dst_blocks[kb.name]
+            write_keyblock_arrays(layout, dst_kb, arrays)
+            changed.append(dst_kb)
+        for kb in changed:
+            mirror_keyblock(dst_data, kb,
+                            axis=self.axis,
+                            swap_handles=self.swap_handles,
+                            layout=layout)
+        if self.reverse_direction and changed:
+            reverse_spline_direction_for_all_keys(dst_data, changed, layout=layout)
+        return len(changed)
+
+    def _can_update(self, src_data, dst_data, settings):
+        """副本的设置、布局与形态键名称顺序都与源一致时才能增量更新"""
+        dst_key = getattr(dst_data, "shape_keys", None)
+        return (self.incremental and np is not None and dst_key is not None
+                and dst_data.get(MIRROR_SETTINGS_PROP) == settings
+                and dst_key.key_blocks.keys() == src_data.shape_keys.key_blocks.keys())
 
     def execute(self, context):
-        obj = context.active_object
-        if not obj or obj.type != 'CURVE':
+        # 处理全部选中的曲线对象；没有选中时退回活动对象
+        candidates = list(context.selected_objects) or [context.active_object]
+        objs = [o for o in candidates if o and o.type == 'CURVE']
+        if not objs:
             self.report({'ERROR'}, "请选择一个曲线（Curve）对象")
             return {'CANCELLED'}
 
-        key = getattr(obj.data, "shape_keys", None)
-        if not key or not key.key_blocks:
-            self.report({'ERROR'}, "该曲线没有形态键（Shape Keys）")
+        # 按曲线数据块分组：共享同一数据块的对象只镜像一次；
+        # 布局只计算一次，所有形态键的镜像与反转共用，点数不一致的数据块在修改任何数据前跳过
+        groups = {}
+        skipped = []
+        for obj in objs:
+            ptr = obj.data.as_pointer()
+            if ptr in groups:
+                groups[ptr][2].append(obj)
+                continue
+            key = getattr(obj.data, "shape_keys", None)
+            if not key or not key.key_blocks:
+                skipped.append(f"{obj.name}（没有形态键）")
+                continue
+            layout = build_curve_layout(obj.data)
+            bad = layout_mismatches(layout, key.key_blocks)
+            if bad:
+                skipped.append(f"{obj.name}（形态键点数与曲线不一致：{', '.join(bad)}）")
+                continue
+            groups[ptr] = (obj.data, layout, [obj])
+        if self.make_copy:
+            # 源曲线与它的镜像副本同时被选中时，副本会在本次执行中被更新，不再把它当作源
+            mirrors = (_own_mirror(data) for data, _layout, _users in groups.values())
+            mirror_ptrs = {mirror.as_pointer() for mirror in mirrors if mirror is not None}
+            for ptr in mirror_ptrs & groups.keys():
+                skipped.extend(f"{obj.name}（是所选曲线的镜像副本）" for obj in groups.pop(ptr)[2])
+        if not groups:
+            self.report({'ERROR'}, "没有可镜像的曲线：" + "；".join(skipped))
             return {'CANCELLED'}
 
-        # 目标对象
+        results = []
+        curve_users = None
+        for src_data, layout, users in groups.values():
+            if not self.make_copy:
+                block_count = self._mirror_data(src_data, layout)
+                results.extend((obj, obj, layout.total, block_count) for obj in users)
+                continue
+
+            # 已有镜像副本时把结果写回原副本对象，不再新建 _MIR；
+            # 只认当前视图层中的副本对象（其它场景/排除的集合中的对象无法选中或激活）
+            owned = _own_mirror(src_data)
+            old_data = owned if self.incremental else None
+            targets = []
+            if old_data is not None:
+                if curve_users is None:
+                    curve_users = _objects_by_curve(context.view_layer.objects)
+                targets = curve_users.get(old_data.as_pointer(), [])
+            settings = mirror_settings_signature(layout, self.axis, self.swap_handles, self.reverse_direction)
+            checksums = {}
+            if targets and self._can_update(src_data, old_data, settings):
+                dst_data = old_data
+                block_count = self._update_mirror(src_data, dst_data, layout, checksums)
+            else:
+                # 目标数据：复制一次数据块，该组的所有对象副本共用它（保持原有的共享关系）
+                dst_data = src_data.copy()
+                for prop in _MIRROR_PROPS:
+                    if prop in dst_data:
+                        del dst_data[prop]
+                # 已有副本时沿用它的链接 ID（属性被覆盖而不是累加）；没有或是 Shift+D 复制来的源则生成新的
+                if owned is None or not isinstance(src_data.get(MIRROR_LINK_PROP), str):
+                    src_data[MIRROR_LINK_PROP] = uuid.uuid4().hex
+                dst_data[MIRROR_SOURCE_PROP] = src_data[MIRROR_LINK_PROP]
+                block_count = self._mirror_data(dst_data, layout)
+                # 设置或拓扑已变化：完整重新镜像后替换原副本对象的数据
+                for target in targets:
+                    target.data = dst_data
+                # 旧副本没有对象再使用时回收；仍被使用（不增量更新、或不在当前视图层）时断开链接，
+                # 保证每个源只关联最新的一个副本
+                if owned is not None:
+                    if owned.users == 0:
+                        bpy.data.curves.remove(owned)
+                    else:
+                        for prop in _MIRROR_PROPS:
+                            if prop in owned:
+                                del owned[prop]
+                dst_data.name = src_data.name + "_MIR"
+                if np is not None:
+                    checksums = {kb.name: keyblock_checksum(read_keyblock_arrays(layout, kb))
+                                 for kb in src_data.shape_keys.key_blocks}
+            dst_data[MIRROR_SOURCE_NAME_PROP] = src_data.name_full
+            if np is not None:
+                dst_data[MIRROR_SETTINGS_PROP] = settings
+                dst_data[MIRROR_CHECKSUMS_PROP] = checksums
+
+            if targets:
+                # 按名称把源对象对应到已有副本对象，其余副本对象归到第一个源对象
+                by_name = {obj.name + "_MIR": obj for obj in users}
+                results.extend((by_name.get(target.name, users[0]), target, layout.total, block_count)
+                               for target in targets)
+                continue
+            for obj in users:
+                # 复制对象并指向镜像后的数据
+                dst = obj.copy()
+                dst.data = dst_data
+                dst.name = obj.name + "_MIR"
+                context.collection.objects.link(dst)
+                # 将新对象与源对象的位移/旋转/缩放保持一致
+                dst.scale = obj.scale.copy()
+                dst.rotation_euler = obj.rotation_euler.copy()
+                dst.location = obj.location.copy()
+                results.append((obj, dst, layout.total, block_count))
+
+        # 选中并激活新对象（若创建副本）；活动对象对应到它的镜像结果
         if self.make_copy:
-            # 复制对象与数据（确保数据独立）
-            new_data = obj.data.copy()
-            new_obj = obj.copy()
-            new_obj.data = new_data
-            new_obj.name = obj.name + "_MIR"
-            new_data.name = obj.data.name + "_MIR"
-            context.collection.objects.link(new_obj)
-            dst = new_obj
+            for o in context.selected_objects:
+                o.select_set(False)
+            for _obj, dst, _points, _blocks in results:
+                dst.select_set(True)
+        active = context.active_object
+        context.view_layer.objects.active = next(
+            (dst for obj, dst, _points, _blocks in results if obj == active), results[0][1])
+
+        # 汇总：每个对象处理的点数与形态键数（共享数据块的对象只镜像一次）
+        for obj, dst, points, blocks in results:
+            print(f"[Curve Mirror SK] {obj.name} -> {dst.name}: {points} 点 × {blocks} 形态键")
+        for reason in skipped:
+            print(f"[Curve Mirror SK] 跳过 {reason}")
+        total_points = sum(layout.total for _data, layout, _users in groups.values())
+        if len(results) <= 5:
+            summary = "，".join(f"{dst.name} {points}点/{blocks}键" for _obj, dst, points, blocks in results)
         else:
-            dst = obj
+            summary = "各对象明细见控制台"
+        message = (f"镜像完成：{len(results)} 个对象（{len(groups)} 个曲线数据，共 {total_points} 点）  |  "
+                   f"轴: {self.axis}  |  {summary}")
+        if skipped:
+            message += f"  |  跳过 {len(skipped)} 个（原因见控制台）"
+        self.report({'WARNING'} if skipped else {'INFO'}, message)
+        return {'FINISHED'}
 
-        # 对每个形态键做镜像
-        key = dst.data.shape_keys
-        blocks = list(key.key_blocks)
-        for kb in blocks:
-            mirror_keyblock(dst.data, kb,
-                            axis=self.axis,
-                            swap_handles=self.swap_handles)
+class CURVE_OT_mirror_shapekeys_topology(bpy.types.Operator):
+    bl_idname = "curve.mirror_shapekeys_topology"
+    bl_label = "拓扑镜像曲线形态键"
+    bl_description = ("为对称曲线（左右两侧的发丝/线缆）生成对侧形态键：在基础形态中用 KD-tree 查找每个点的镜像伙伴，"
+                      "把伙伴点的偏移按轴翻转后写入新的形态键")
+    bl_options = {'REGISTER', 'UNDO'}
 
-        # 高级：反转每条曲线方向
-        if self.reverse_direction:
-            reverse_spline_direction_for_all_keys(dst.data, blocks)
+    axis: bpy.props.EnumProperty(
+        name="镜像轴",
+        items=[('X', 'X', '沿 X 轴镜像'),
+               ('Y', 'Y', '沿 Y 轴镜像'),
+               ('Z', 'Z', '沿 Z 轴镜像')],
+        default='X'
+    )
+    tolerance: bpy.props.FloatProperty(
+        name="匹配容差",
+        description="镜像位置与伙伴点之间允许的最大距离",
+        default=0.0001,
+        min=0.0,
+        soft_max=0.01,
+        precision=5,
+    )
+    only_active: bpy.props.BoolProperty(
+        name="仅活动形态键",
+        description="勾选：只镜像当前活动的形态键；不勾选：镜像除基础形态外的所有形态键",
+        default=False
+    )
 
-        # 自动刷新视图，不需要手动调用 update
-        context.view_layer.objects.active = dst
+    def execute(self, context):
+        if np is None:
+            self.report({'ERROR'}, "拓扑镜像需要 NumPy")
+            return {'CANCELLED'}
+        obj = context.active_object
+        if not obj or obj.type != 'CURVE':
+            self.report({'ERROR'}, "请选择一个曲线（Curve）对象")
+            return {'CANCELLED'}
+        key = getattr(obj.data, "shape_keys", None)
+        if not key or len(key.key_blocks) < 2:
+            self.report({'ERROR'}, "该曲线除基础形态外没有形态键（Shape Keys）")
+            return {'CANCELLED'}
 
-        if self.make_copy:
-            # 将新对象与源对象的位移/旋转/缩放保持一致
-            dst.scale = obj.scale.copy()
-            dst.rotation_euler = obj.rotation_euler.copy()
-            dst.location = obj.location.copy()
+        layout = build_curve_layout(obj.data)
+        bad = layout_mismatches(layout, key.key_blocks)
+        if bad:
+            self.report({'ERROR'}, f"形态键点数与曲线不一致：{', '.join(bad)}")
+            return {'CANCELLED'}
 
-        # 选中并激活新对象（若创建副本）
-        if self.make_copy:
-            for o in context.selected_objects:
-                o.select_set(False)
-            dst.select_set(True)
+        basis = key.reference_key
+        if self.only_active:
+            sources = [obj.active_shape_key] if obj.active_shape_key != basis else []
+        else:
+            sources = [kb for kb in key.key_blocks if kb != basis]
+        if not sources:
+            self.report({'ERROR'}, "没有可镜像的形态键（基础形态不能镜像）")
+            return {'CANCELLED'}
+        # 已是镜像结果的形态键（smile_MIR、后建的 smile.R）不再作为源，重复执行时不会生成 _MIR_MIR / .001
+        positions = {kb.name: i for i, kb in enumerate(key.key_blocks)}
+        skipped = [kb.name for kb in sources if _is_mirror_result(kb.name, positions)]
+        sources = [kb for kb in sources if kb.name not in skipped and _mirrored_key_name(kb.name) != basis.name]
+        if not sources:
+            self.report({'INFO'}, f"所选形态键都是镜像结果，已跳过：{', '.join(skipped)}")
+            return {'CANCELLED'}
+
+        # 伙伴映射按曲线缓存，所有形态键共用
+        basis_arrays = read_keyblock_arrays(layout, basis)
+        partners = get_partner_map(obj.data, basis_arrays["co"], self.axis, self.tolerance)
+        unmatched = int(np.count_nonzero(partners < 0))
+
+        # 先读出所有源形态键，再追加新形态键（追加会改变 key_blocks 集合）
+        relative_cache = {basis.name: basis_arrays}
+        jobs = []
+        for kb in sources:
+            rel = kb.relative_key
+            if rel.name not in relative_cache:
+                relative_cache[rel.name] = read_keyblock_arrays(layout, rel)
+            mirrored = topology_mirror_arrays(read_keyblock_arrays(layout, kb), relative_cache[rel.name],
+                                              partners, self.axis)
+            jobs.append((kb.name, rel.name, kb.slider_min, kb.slider_max, kb.interpolation,
+                         kb.vertex_group, mirrored))
+
+        created = []
+        updated = []
+        for name, rel_name, slider_min, slider_max, interpolation, vertex_group, mirrored in jobs:
+            # 对侧形态键已存在时写回该形态键，重复执行结果不变
+            target_name = _mirrored_key_name(name)
+            new_kb = key.key_blocks.get(target_name)
+            if new_kb is None:
+                new_kb = obj.shape_key_add(name=target_name, from_mix=False)
+                created.append(new_kb.name)
+            else:
+                updated.append(new_kb.name)
+            new_kb.relative_key = key.key_blocks[rel_name]
+            new_kb.slider_min = slider_min
+            new_kb.slider_max = slider_max
+            new_kb.interpolation = interpolation
+            if vertex_group:
+                new_kb.vertex_group = bpy.utils.flip_name(vertex_group)
+            write_keyblock_arrays(layout, new_kb, mirrored)
 
-        self.report({'INFO'}, f"镜像完成：{dst.name}  |  轴: {self.axis}")
+        obj.data.update_tag()
+        message = f"拓扑镜像完成：新建 {len(created)} 个、更新 {len(updated)} 个形态键  |  轴: {self.axis}"
+        if skipped:
+            message += f"  |  跳过 {len(skipped)} 个镜像结果"
+        if unmatched:
+            message += f"  |  {unmatched}/{layout.total} 个点未找到伙伴（保持原值，可调大容差）"
+        self.report({'WARNING'} if unmatched else {'INFO'}, message)
         return {'FINISHED'}
 
 class VIEW3D_PT_curve_mirror_sk(bpy.types.Panel):
@@ -203,12 +726,23 @@ class VIEW3D_PT_curve_mirror_sk(bpy.types.Panel):
         col.prop(context.scene, "cmsk_make_copy", text="创建镜像副本对象")
         col.prop(context.scene, "cmsk_swap_handles", text="交换贝塞尔手柄")
         col.prop(context.scene, "cmsk_reverse_direction", text="反转曲线方向（高级）")
+        col.prop(context.scene, "cmsk_incremental", text="增量更新已有镜像副本")
 
         op = col.operator("curve.mirror_shapekeys", text="执行镜像", icon='MOD_MIRROR')
         op.axis = context.scene.cmsk_axis
         op.make_copy = context.scene.cmsk_make_copy
         op.swap_handles = context.scene.cmsk_swap_handles
         op.reverse_direction = context.scene.cmsk_reverse_direction
+        op.incremental = context.scene.cmsk_incremental
+
+        col.separator()
+        col.label(text="对称曲线拓扑镜像")
+        col.prop(context.scene, "cmsk_topology_tolerance", text="匹配容差")
+        col.prop(context.scene, "cmsk_topology_only_active", text="仅活动形态键")
+        op = col.operator("curve.mirror_shapekeys_topology", text="拓扑镜像形态键", icon='MOD_MIRROR')
+        op.axis = context.scene.cmsk_axis
+        op.tolerance = context.scene.cmsk_topology_tolerance
+        op.only_active = context.scene.cmsk_topology_only_active
 
 def _ensure_scene_props():
     sce = bpy.types.Scene
@@ -230,9 +764,22 @@ def _ensure_scene_props():
         sce.cmsk_reverse_direction = bpy.props.BoolProperty(
             name="Reverse Direction", default=False
         )
+    if not hasattr(sce, "cmsk_incremental"):
+        sce.cmsk_incremental = bpy.props.BoolProperty(
+            name="Incremental", default=True
+        )
+    if not hasattr(sce, "cmsk_topology_tolerance"):
+        sce.cmsk_topology_tolerance = bpy.props.FloatProperty(
+            name="Topology Tolerance", default=0.0001, min=0.0, precision=5
+        )
+    if not hasattr(sce, "cmsk_topology_only_active"):
+        sce.cmsk_topology_only_active = bpy.props.BoolProperty(
+            name="Topology Only Active", default=False
+        )
 
 classes = (
     CURVE_OT_mirror_shapekeys,
+    CURVE_OT_mirror_shapekeys_topology,
     VIEW3D_PT_curve_mirror_sk,
 )
 
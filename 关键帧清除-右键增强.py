@@ -1,82 +1,747 @@
 bl_info = {
     "name": "关键帧清除-右键增强",
     "author": "vvenhongfei",
-    "version": (1, 0, 0),
+    "version": (2, 0, 0),
     "blender": (4, 5, 0),
     "location": "Pose Mode → N侧边栏/右键菜单；Dope Sheet/Timeline/Graph → 右键菜单",
     "description": "合并：骨骼（Pose）精确选中关键帧清除 + 右键增强的选中关键帧按通道删除，支持多物体/骨骼/灯光/曲线等",
     "category": "Animation",
 }
 
+import os
+import re
+import sys
+import csv
+import json
+import time
+import random
+import argparse
+import subprocess
+import types
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, wraps
+
 import bpy
-from bpy.types import Operator, Panel, Menu
+from bpy.app.handlers import persistent
+from bpy.types import Operator, Panel, Menu, AddonPreferences
 from bpy.utils import register_class, unregister_class
 
+try:
+    import numpy as np
+except ImportError:  # Blender 官方版本自带 numpy；自编译版本可能缺失，此时回退逐帧循环
+    np = None
+
 # ------------------------------
 # 通用刷新函数
 # ------------------------------
-def refresh_animation_views():
-    """刷新时间线/曲线/3D视图，展示最新关键帧状态"""
+REFRESH_MODE_ITEMS = [
+    ('TAG_ONLY', "仅标记更新", "只标记被修改的 action/物体并重绘动画编辑器，依赖图只重算相关数据"),
+    ('FULL', "完整重新求值", "额外重设当前帧，强制整个场景（驱动器/约束/修改器/模拟缓存）重新求值"),
+]
+
+# 本次删除修改过的 ID（action / 物体），由 refresh_animation_views 消费后清空
+_touched_ids = set()
+# 各刷新模式最近一次耗时（秒）
+_refresh_timings = {}
+
+def _mark_touched(*ids):
+    ids = [i for i in ids if i is not None]
+    _touched_ids.update(ids)
+    # 被修改的 action 选中数必然变化，直接丢弃其选中摘要
+    for id_data in ids:
+        _selection_summary_cache.pop(id_data.as_pointer(), None)
+
+def _get_refresh_mode():
+    try:
+        return bpy.context.preferences.addons[__name__].preferences.refresh_mode
+    except Exception:
+        return 'TAG_ONLY'
+
+def refresh_animation_views(mode=None):
+    """
+    刷新时间线/曲线/3D视图，展示最新关键帧状态
+    mode: 'TAG_ONLY' / 'FULL'，None 时读取插件偏好设置；返回耗时（秒）
+    """
+    if mode is None:
+        mode = _get_refresh_mode()
+    start = time.perf_counter()
+
+    # 只标记被修改的 ID，下次依赖图求值时仅重算它们
+    for id_data in _touched_ids:
+        try:
+            if isinstance(id_data, bpy.types.Object):
+                id_data.update_tag(refresh={'TIME'})
+            else:
+                id_data.update_tag()
+        except ReferenceError:
+            pass  # ID 已被删除
+    _touched_ids.clear()
+
     wm = bpy.context.window_manager
     for win in wm.windows:
         for area in win.screen.areas:
             if area.type in ('TIMELINE', 'GRAPH_EDITOR', 'DOPESHEET_EDITOR', 'VIEW_3D'):
                 area.tag_redraw()
-    # 触发场景更新
-    scene = bpy.context.scene
-    current_frame = scene.frame_current
-    scene.frame_current = current_frame
+    if mode == 'FULL':
+        # 触发场景更新
+        scene = bpy.context.scene
+        current_frame = scene.frame_current
+        scene.frame_current = current_frame
+
+    elapsed = time.perf_counter() - start
+    _refresh_timings[mode] = elapsed
+    _stats_add(refresh_time=elapsed)
+    return elapsed
+
+# ------------------------------
+# 运行统计：每次 Operator 运行记录扫描/删除/刷新分段耗时与计数
+# ------------------------------
+class _RunStats:
+    """单次 Operator 运行的统计；计数与耗时（秒）由底层删除函数在运行期间累加"""
+
+    FIELDS = ("curves_scanned", "keys_inspected", "keys_deleted", "empty_curves_removed",
+              "scan_time", "delete_time", "refresh_time")
+
+    def __init__(self, operator):
+        self.operator = operator
+        self.timestamp = time.time()
+        self.total_time = 0.0
+        for field in self.FIELDS:
+            setattr(self, field, 0)
+
+    def add(self, **amounts):
+        for field, value in amounts.items():
+            setattr(self, field, getattr(self, field) + value)
+
+# 最近的运行记录（旧的在前），最多保留 _RUN_HISTORY_LIMIT 条
+_RUN_HISTORY_LIMIT = 100
+_run_history = []
+# 正在执行的 Operator 的统计；为 None 时（命令行批处理等）底层函数不做记录
+_current_run = None
+
+def _stats_add(**amounts):
+    if _current_run is not None:
+        _current_run.add(**amounts)
+
+def _push_run(run):
+    _run_history.append(run)
+    del _run_history[:-_RUN_HISTORY_LIMIT]
+
+def _run_label(op):
+    """运行记录中的操作名：按通道参数化的 Operator 记录具体通道（如 X位置），其余记录 bl_label"""
+    if hasattr(op, "kind") and hasattr(op, "index"):
+        return _channel_label(op.kind, op.index)
+    return op.bl_label
+
+def _record_run(execute):
+    """Operator.execute 装饰器：执行期间收集统计，成功完成后写入运行记录"""
+    @wraps(execute)
+    def wrapper(self, context):
+        global _current_run
+        run = _current_run = _RunStats(_run_label(self))
+        start = time.perf_counter()
+        try:
+            result = execute(self, context)
+        finally:
+            _current_run = None
+        run.total_time = time.perf_counter() - start
+        if 'FINISHED' in result:
+            _push_run(run)
+        return result
+    return wrapper
+
+def export_run_history_csv(filepath):
+    """把运行记录写成 CSV（耗时单位毫秒），返回写出的行数"""
+    with open(filepath, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["timestamp", "operator", "curves_scanned", "keys_inspected", "keys_deleted",
+                         "empty_curves_removed", "scan_ms", "delete_ms", "refresh_ms", "total_ms"])
+        for run in _run_history:
+            writer.writerow([
+                time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(run.timestamp)), run.operator,
+                run.curves_scanned, run.keys_inspected, run.keys_deleted, run.empty_curves_removed,
+                f"{run.scan_time * 1000.0:.3f}", f"{run.delete_time * 1000.0:.3f}",
+                f"{run.refresh_time * 1000.0:.3f}", f"{run.total_time * 1000.0:.3f}",
+            ])
+    return len(_run_history)
+
+# ------------------------------
+# 关键帧批量扫描（foreach_get + NumPy）
+# ------------------------------
+def _scan_fcurve_keyframes(fcurve):
+    """
+    一次 foreach_get 只读取整条 fcurve 的选中标记（其余属性只在确有选中帧、需要重建时才读取）
+    返回 selected: bool[n]；无 numpy 或读取失败时返回 None
+    """
+    if np is None:
+        return None
+    kps = fcurve.keyframe_points
+    selected = np.zeros(len(kps), dtype=bool)
+    if len(kps):
+        try:
+            kps.foreach_get("select_control_point", selected)
+        except Exception:
+            return None
+    return selected
+
+def _count_selected_keyframes(fcurve) -> int:
+    """统计 fcurve 上被选中的关键帧数量（只读取选中标记）"""
+    kps = fcurve.keyframe_points
+    n = len(kps)
+    if np is not None and n:
+        selected = np.zeros(n, dtype=bool)
+        try:
+            kps.foreach_get("select_control_point", selected)
+            return int(np.count_nonzero(selected))
+        except Exception:
+            pass
+    return sum(1 for kp in kps if getattr(kp, "select_control_point", False))
+
+def _selected_keyframe_indices(fcurve):
+    """返回 fcurve 上被选中关键帧的索引列表（升序）；优先走批量扫描，失败时逐帧回退"""
+    selected = _scan_fcurve_keyframes(fcurve)
+    if selected is not None:
+        return np.flatnonzero(selected).tolist()
+    return [i for i, kp in enumerate(fcurve.keyframe_points) if getattr(kp, "select_control_point", False)]
+
+# ------------------------------
+# 关键帧批量删除（foreach_get → clear/add → foreach_set）
+# ------------------------------
+# 批量重写时需要保留的 Keyframe 属性：(属性名, 每帧分量数, dtype 代号)
+# 枚举属性（插值/缓动/类型/手柄类型）通过 foreach 以整数值读写
+_KEYFRAME_ATTRS = (
+    ("co", 2, "f"),
+    ("handle_left", 2, "f"),
+    ("handle_right", 2, "f"),
+    ("interpolation", 1, "i"),
+    ("easing", 1, "i"),
+    ("type", 1, "i"),
+    ("handle_left_type", 1, "i"),
+    ("handle_right_type", 1, "i"),
+    ("back", 1, "f"),
+    ("amplitude", 1, "f"),
+    ("period", 1, "f"),
+    ("select_control_point", 1, "b"),
+    ("select_left_handle", 1, "b"),
+    ("select_right_handle", 1, "b"),
+)
+
+def _read_keyframe_attrs(fcurve):
+    """
+    用 foreach_get 读出整条曲线的全部 Keyframe 属性，返回 [(属性名, 数组[n, 分量数]), ...]
+    任一属性读取失败时返回 None：重建会把读不到的属性重置为默认值，调用方须改走逐帧 remove()
+    """
+    kps = fcurve.keyframe_points
+    n = len(kps)
+    dtypes = {"f": np.float32, "i": np.int32, "b": bool}
+    attrs = []
+    for attr, width, code in _KEYFRAME_ATTRS:
+        buf = np.empty(n * width, dtype=dtypes[code])
+        try:
+            kps.foreach_get(attr, buf)
+        except (AttributeError, TypeError, RuntimeError):
+            return None
+        attrs.append((attr, buf.reshape(n, width)))
+    return attrs
+
+def _remove_keyframes_per_key(fcurve, indices) -> int:
+    """逐帧倒序 remove()（保留其余关键帧的全部属性），返回删除数量"""
+    kps = fcurve.keyframe_points
+    removed = 0
+    for i in sorted(indices, reverse=True):
+        try:
+            kps.remove(kps[i])
+            removed += 1
+        except Exception:
+            pass
+    return removed
+
+def _write_keyframe_attrs(fcurve, attrs, count):
+    """clear() 后一次 add(count) 重建关键帧，逐属性 foreach_set 写回，最后 update() 一次（排序并重算手柄）"""
+    kps = fcurve.keyframe_points
+    kps.clear()
+    if count:
+        kps.add(count)
+        for attr, buf in attrs:
+            kps.foreach_set(attr, buf.ravel())
+        fcurve.update()
+
+def _remove_keyframes_bulk(fcurve, remove_mask) -> int:
+    """
+    按布尔掩码批量删除关键帧：读出保留帧的全部属性，clear() 后一次 add() 重建并写回
+    返回删除数量
+    """
+    removed = int(np.count_nonzero(remove_mask))
+    if removed == 0:
+        return 0
+    keep = ~remove_mask
+    kept = len(remove_mask) - removed
+    if not kept:
+        _write_keyframe_attrs(fcurve, [], 0)
+        return removed
+    attrs = _read_keyframe_attrs(fcurve)
+    if attrs is None:
+        return _remove_keyframes_per_key(fcurve, np.flatnonzero(remove_mask).tolist())
+    _write_keyframe_attrs(fcurve, [(attr, buf[keep]) for attr, buf in attrs], kept)
+    return removed
+
+def _delete_selected_on_fcurve(fcurve) -> int:
+    """删除单条 fcurve 上全部选中的关键帧，返回删除数量"""
+    kps = fcurve.keyframe_points
+    n = len(kps)
+    start = time.perf_counter()
+    selected = _scan_fcurve_keyframes(fcurve)
+    if selected is not None:
+        scanned = time.perf_counter()
+        removed = _remove_keyframes_bulk(fcurve, selected)
+    else:
+        # 回退：逐帧倒序删除
+        selected = _selected_keyframe_indices(fcurve)
+        scanned = time.perf_counter()
+        removed = _remove_keyframes_per_key(fcurve, selected)
+    _stats_add(curves_scanned=1, keys_inspected=n, keys_deleted=removed,
+               scan_time=scanned - start, delete_time=time.perf_counter() - scanned)
+    return removed
+
+# ------------------------------
+# 通道索引：每个 action 只解析一次 data_path
+# ------------------------------
+TRANSFORM_KINDS = ("location", "rotation_euler", "rotation_quaternion", "scale")
+
+# pose.bones["骨骼名"].属性 或 顶层属性；自定义属性（["prop"]）与嵌套路径不匹配
+_DATA_PATH_RE = re.compile(r'^(?:pose\.bones\["((?:[^"\\]|\\.)*)"\]\.)?([A-Za-z_]\w*)$')
+
+@lru_cache(maxsize=8192)
+def _parse_data_path(data_path):
+    """把 data_path 解析为 (骨骼名 | None, 属性名)；无法识别的路径返回 (None, None)"""
+    m = _DATA_PATH_RE.match(data_path)
+    if not m:
+        return None, None
+    bone = m.group(1)
+    if bone is not None:
+        bone = bone.replace('\\"', '"').replace("\\\\", "\\")
+    return bone, m.group(2)
+
+_BONE_PREFIX_RE = re.compile(r'^pose\.bones\["((?:[^"\\]|\\.)*)"\]')
+
+@lru_cache(maxsize=8192)
+def _bone_name_of(data_path):
+    """取 pose.bones["..."] 开头路径中的骨骼名（包含自定义属性等任意子路径），否则返回 None"""
+    m = _BONE_PREFIX_RE.match(data_path)
+    if not m:
+        return None
+    return m.group(1).replace('\\"', '"').replace("\\\\", "\\")
+
+# ------------------------------
+# Action Slot（Blender 4.4+ 分层 action）
+# ------------------------------
+def _action_and_slot(id_data):
+    """返回 (action, slot)；无动画时为 (None, None)，旧版 Blender 没有 slot 时 slot 为 None"""
+    ad = getattr(id_data, "animation_data", None)
+    if not (ad and ad.action):
+        return None, None
+    return ad.action, getattr(ad, "action_slot", None)
+
+def _action_fcurves(action, slot=None):
+    """
+    返回需要遍历的 F-curve 集合：
+    分层 action 只取 slot 对应的 channelbag（一个 action 可能装着许多 slot 的曲线），
+    传统 action / 旧版 Blender / 未指定 slot 时回退到 action.fcurves
+    """
+    if slot is None or not getattr(action, "is_action_layered", False):
+        return action.fcurves
+    for layer in action.layers:
+        for strip in layer.strips:
+            channelbag = strip.channelbag(slot)
+            if channelbag is not None:
+                return channelbag.fcurves
+    return ()
+
+def _slot_key(slot):
+    return None if slot is None else slot.handle
+
+class _ActionChannelIndex:
+    """单个 action（slot）的通道索引：fcurve -> (骨骼名, 属性, 分量)，并按属性、按骨骼分组"""
+
+    def __init__(self, action, slot=None):
+        fcurves = _action_fcurves(action, slot)
+        self.action_ptr = action.as_pointer()
+        self.fcurve_count = len(fcurves)
+        self.entries = {}
+        self.by_prop = {}
+        self.by_bone = {}
+        for fc in fcurves:
+            bone, prop = _parse_data_path(fc.data_path)
+            if prop not in TRANSFORM_KINDS:
+                continue
+            entry = (bone, prop, fc.array_index)
+            self.entries[fc] = entry
+            self.by_prop.setdefault(prop, []).append((fc, entry))
+            if bone is not None:
+                self.by_bone.setdefault(bone, []).append((fc, entry))
+
+    def is_valid_for(self, action, slot=None):
+        return (self.action_ptr == action.as_pointer()
+                and self.fcurve_count == len(_action_fcurves(action, slot)))
+
+# action.as_pointer() -> {slot handle | None: _ActionChannelIndex}；撤销/重做/载入文件时整体清空，
+# action 在依赖图中被更新（插帧、删曲线、改名等）时单独失效
+_channel_index_cache = {}
+
+def _get_channel_index(action, slot=None):
+    """取得（必要时重建）action（slot）的通道索引；F-curve 数量或 action 变化时自动失效"""
+    per_slot = _channel_index_cache.setdefault(action.as_pointer(), {})
+    key = _slot_key(slot)
+    index = per_slot.get(key)
+    if index is None or not index.is_valid_for(action, slot):
+        index = _ActionChannelIndex(action, slot)
+        per_slot[key] = index
+    return index
+
+def _invalidate_channel_index(action):
+    _channel_index_cache.pop(action.as_pointer(), None)
+
+def _lookup_channel_fcurves(action, kinds, indices=None, *, slot=None, bones_only=False, bone_names=None,
+                            channel_filter=None, users=()):
+    """
+    查找 action 中匹配 kinds/indices 的 F-curve，返回 [(fcurve, kind), ...]
+    indices: None、分量集合，或 {kind: 分量集合 | None}（按通道分别指定分量，供批量清除使用）
+    slot: 分层 action 的 slot，只查找该 slot 的 channelbag
+    bones_only: 只返回 pose.bones 通道
+    bone_names: 只返回这些骨骼的通道（经 骨骼名 -> F-curve 映射直接定位，不扫描其它骨骼）
+    channel_filter: _EditorChannelFilter，只返回动画编辑器中可见的通道；users 为使用该 action 的物体
+    """
+    index = _get_channel_index(action, slot)
+    if bone_names is not None:
+        candidates = [item for name in bone_names for item in index.by_bone.get(name, ())]
+    else:
+        candidates = [item for kind in kinds for item in index.by_prop.get(kind, ())]
+    per_kind = isinstance(indices, dict)
+    result = []
+    for fc, (bone, prop, array_index) in candidates:
+        if prop not in kinds:
+            continue
+        if bones_only and bone is None:
+            continue
+        allowed = indices.get(prop) if per_kind else indices
+        if allowed is not None and array_index not in allowed:
+            continue
+        if channel_filter is not None and not channel_filter.accepts(fc, bone, prop, array_index, users):
+            continue
+        result.append((fc, prop))
+    return result
+
+# ------------------------------
+# 动画编辑器通道可见性（曲线编辑器隐藏、仅显示选中、仅显示错误、搜索过滤）
+# ------------------------------
+# 通道在动画编辑器中显示的属性名（与 RNA 属性的界面名称一致）
+_CHANNEL_UI_NAMES = {
+    "location": "Location",
+    "rotation_euler": "Euler Rotation",
+    "rotation_quaternion": "Quaternion Rotation",
+    "scale": "Scale",
+}
+
+def _channel_display_name(bone, prop, array_index):
+    """拼出编辑器通道列表中的名称，例如 X Location (Bone)，供搜索过滤匹配"""
+    axes = "WXYZ" if prop == "rotation_quaternion" else "XYZ"
+    axis = axes[array_index] if 0 <= array_index < len(axes) else str(array_index)
+    name = f"{axis} {_CHANNEL_UI_NAMES.get(prop, prop)}"
+    return name if bone is None else f"{name} ({bone})"
+
+def _pose_bone_flags(ob, bone_name):
+    """返回骨骼的 (是否选中, 是否隐藏)，隐藏包含所属骨骼集合全部不可见的情况；物体不是骨架或没有该骨骼时返回 None"""
+    pose = getattr(ob, "pose", None)
+    pb = pose.bones.get(bone_name) if pose else None
+    if pb is None:
+        return None
+    # Blender 5.0 起选中/隐藏状态在 PoseBone 上，旧版本在 Bone 上
+    select = getattr(pb, "select", None)
+    hide = getattr(pb, "hide", None)
+    if select is None:
+        select = pb.bone.select
+    if hide is None:
+        hide = pb.bone.hide
+    # 所属骨骼集合全部隐藏时，骨骼在视图与动画编辑器中同样不可见（未分配集合的骨骼始终可见）
+    collections = getattr(pb.bone, "collections", None)
+    if not hide and collections:
+        hide = not any(getattr(bcoll, "is_visible_effectively", bcoll.is_visible) for bcoll in collections)
+    return select, hide
+
+class _EditorChannelFilter:
+    """按曲线编辑器/摄影表当前的通道过滤设置判断 F-curve 是否可见"""
+
+    def __init__(self, space):
+        ads = space.dopesheet
+        self.check_hide = space.type == 'GRAPH_EDITOR'
+        self.only_selected = ads.show_only_selected
+        self.show_hidden = ads.show_hidden
+        self.only_errors = getattr(ads, "show_only_errors", False)
+        self.invert = getattr(ads, "use_filter_invert", False)
+        text = ads.filter_text.strip().lower()
+        self.multi_word = getattr(ads, "use_multi_word_filter", False)
+        self.words = text.split() if self.multi_word else ([text] if text else [])
+
+    def _bone_visible(self, bone, users):
+        # 任意一个使用该 action 的骨架上该骨骼可见即视为可见；不是骨架的使用者不做骨骼过滤
+        found = False
+        for ob in users:
+            flags = _pose_bone_flags(ob, bone)
+            if flags is None:
+                continue
+            found = True
+            select, hide = flags
+            if (select or not self.only_selected) and (not hide or self.show_hidden):
+                return True
+        return not found
+
+    def _name_matches(self, name):
+        # 与编辑器一致：不区分大小写的子串匹配（多词模式任一词匹配即可），不解释 [ ] ? * 等通配符
+        name = name.lower()
+        matched = any(word in name for word in self.words)
+        return matched != self.invert
+
+    def accepts(self, fcurve, bone, prop, array_index, users=()):
+        if self.check_hide and fcurve.hide:
+            return False
+        if self.only_errors and fcurve.is_valid:
+            return False
+        if bone is not None and (self.only_selected or not self.show_hidden) and not self._bone_visible(bone, users):
+            return False
+        if self.words and not self._name_matches(_channel_display_name(bone, prop, array_index)):
+            return False
+        return True
+
+def _respect_editor_filters():
+    try:
+        return bpy.context.preferences.addons[__name__].preferences.respect_editor_filters
+    except Exception:
+        return False
+
+def _editor_channel_filter(context):
+    """偏好设置开启且从曲线编辑器/摄影表调用时返回该编辑器的通道过滤，否则返回 None（处理全部通道）"""
+    space = getattr(context, "space_data", None)
+    if space is None or space.type not in ('GRAPH_EDITOR', 'DOPESHEET_EDITOR'):
+        return None
+    if not _respect_editor_filters():
+        return None
+    return _EditorChannelFilter(space)
+
+# ------------------------------
+# 选中关键帧摘要（右键菜单显示待删除数量）
+# ------------------------------
+# action.as_pointer() -> {slot handle | None: {(骨骼名, 属性, 分量): 选中数}}
+# 菜单绘制只读取摘要；action 更新（依赖图）、关键帧选择变化（msgbus）、撤销/载入及本插件修改时失效
+_selection_summary_cache = {}
+# 编辑器里的点选/框选/全选等选择 Operator 直接改写关键帧标记，既不经过 RNA（msgbus 不触发）
+# 也不标记依赖图；它们会进入 window_manager.operators，因此记录建立摘要时的操作历史签名，签名变化即整体失效
+_selection_summary_signature = None
+
+def _operator_history_signature(context):
+    ops = context.window_manager.operators
+    return len(ops), (ops[-1].as_pointer() if len(ops) else 0)
+
+def _validate_selection_summary(context):
+    """操作历史自上次建立摘要后有变化时清空摘要（历史长度到达上限后仍可由最后一个 Operator 区分）"""
+    global _selection_summary_signature
+    try:
+        signature = _operator_history_signature(context)
+    except AttributeError:
+        return  # 无 window_manager（命令行/基准测试的伪 context）
+    if signature != _selection_summary_signature:
+        _selection_summary_cache.clear()
+        _selection_summary_signature = signature
+
+def _get_selection_summary(action, slot=None):
+    per_slot = _selection_summary_cache.setdefault(action.as_pointer(), {})
+    key = _slot_key(slot)
+    summary = per_slot.get(key)
+    if summary is None:
+        summary = {}
+        for fc, entry in _get_channel_index(action, slot).entries.items():
+            count = _count_selected_keyframes(fc)
+            if count:
+                summary[entry] = summary.get(entry, 0) + count
+        per_slot[key] = summary
+    return summary
+
+def _selected_key_counts(context):
+    """
+    按与删除相同的目标规则（Pose 模式取选中骨骼，否则取选中物体）汇总选中关键帧数
+    返回 {(属性, 分量): 数量}
+    """
+    if _is_pose_context(context):
+        groups = _pose_action_targets(context)
+    else:
+        groups = [(action, slot, None, users) for action, slot, users in _group_objects_by_action(_iter_target_objects(context))]
+    channel_filter = _editor_channel_filter(context)
+    _validate_selection_summary(context)
+    counts = {}
+    for action, slot, bone_names, users in groups:
+        if channel_filter is not None:
+            # 可见性取决于单条曲线，不能使用按通道汇总的摘要缓存
+            summary = {}
+            for fc, entry in _get_channel_index(action, slot).entries.items():
+                if channel_filter.accepts(fc, *entry, users):
+                    summary[entry] = summary.get(entry, 0) + _count_selected_keyframes(fc)
+        else:
+            summary = _get_selection_summary(action, slot)
+        for (bone, prop, array_index), n in summary.items():
+            if bone_names is not None and bone not in bone_names:
+                continue
+            counts[(prop, array_index)] = counts.get((prop, array_index), 0) + n
+    return counts
+
+def _count_for_channel(counts, kind, index):
+    kinds = _KIND_TARGETS[kind]
+    return sum(n for (prop, array_index), n in counts.items()
+               if prop in kinds and (index < 0 or array_index == index))
+
+# msgbus 订阅者标识；载入文件会清空所有订阅，需要在 load_post 中重新订阅
+_msgbus_owner = object()
+
+def _on_keyframe_selection_changed(*_args):
+    _selection_summary_cache.clear()
+
+def _subscribe_selection_msgbus():
+    bpy.msgbus.clear_by_owner(_msgbus_owner)
+    for prop in ("select_control_point", "select_left_handle", "select_right_handle"):
+        bpy.msgbus.subscribe_rna(
+            key=(bpy.types.Keyframe, prop),
+            owner=_msgbus_owner,
+            args=(),
+            notify=_on_keyframe_selection_changed,
+        )
+
+@persistent
+def _resubscribe_selection_msgbus(*_args):
+    _subscribe_selection_msgbus()
+
+@persistent
+def _clear_channel_index_cache(*_args):
+    _channel_index_cache.clear()
+    _selection_summary_cache.clear()
+
+@persistent
+def _on_depsgraph_update_channel_index(scene, depsgraph):
+    if not (_channel_index_cache or _selection_summary_cache):
+        return
+    for update in depsgraph.updates:
+        if isinstance(update.id, bpy.types.Action):
+            ptr = update.id.original.as_pointer()
+            _channel_index_cache.pop(ptr, None)
+            _selection_summary_cache.pop(ptr, None)
+
+_CACHE_CLEAR_HANDLERS = ("undo_post", "redo_post", "load_post")
 
 # ------------------------------
 # 来自“骨骼专用”插件的函数
 # ------------------------------
-def get_selected_keyframes(armature):
-    """获取 armature.action 中被手动选中的关键帧 (返回 (fcurve, idx, kp) 列表)"""
+def get_selected_keyframes(armature, target_bones=None):
+    """
+    获取 armature.action 中被手动选中的关键帧 (返回 (fcurve, idx, kp) 列表)
+    target_bones: 可选，只统计这些骨骼（PoseBone 序列）的曲线
+    """
     selected_kfs = []
-    if not (armature and getattr(armature, "animation_data", None) and armature.animation_data.action):
+    action, slot = _action_and_slot(armature)
+    if action is None:
         return selected_kfs
+    bone_names = None if target_bones is None else {pb.name for pb in target_bones}
 
-    for fcurve in armature.animation_data.action.fcurves:
+    for fcurve in _action_fcurves(action, slot):
         if "pose.bones[" in fcurve.data_path and fcurve.keyframe_points:
-            for idx, kp in enumerate(fcurve.keyframe_points):
-                if getattr(kp, "select_control_point", False):
-                    selected_kfs.append((fcurve, idx, kp))
+            if bone_names is not None and _bone_name_of(fcurve.data_path) not in bone_names:
+                continue
+            kps = fcurve.keyframe_points
+            for idx in _selected_keyframe_indices(fcurve):
+                selected_kfs.append((fcurve, idx, kps[idx]))
     return selected_kfs
 
-def delete_selected_keyframes_for_armature(armature, target_bones, data_path_keyword, indices=None):
+def delete_selected_keyframes_for_armature(armature, target_bones, data_path_keyword, indices=None, per_channel=None):
     """
-    从 armature.animation_data.action 中删除选中的关键帧
-    data_path_keyword: 'location' / 'scale' / 'rotation_quaternion' / 'rotation_euler'
-    indices: None 或集合 {0,1,2,3}
+    从 armature.animation_data.action 中删除选中的关键帧，只处理 target_bones（PoseBone 序列，None 表示全部骨骼）的曲线
+    data_path_keyword: 'location' / 'scale' / 'rotation_quaternion' / 'rotation_euler'，
+                       也可传入多个关键字的集合，一次遍历内同时处理
+    indices: None、集合 {0,1,2,3}，或 {关键字: 集合 | None}
+    per_channel: 可选 dict，按 (关键字, array_index) 累加删除数量
+    """
+    action, slot = _action_and_slot(armature)
+    if action is None:
+        return 0
+    bone_names = None if target_bones is None else {pb.name for pb in target_bones}
+    deleted_count = _delete_selected_keyframes_for_action(action, slot, bone_names, data_path_keyword,
+                                                          indices, per_channel=per_channel)
+    if deleted_count:
+        _mark_touched(action, armature)
+    return deleted_count
+
+def _delete_selected_keyframes_for_action(action, slot, bone_names, data_path_keyword, indices=None, per_channel=None,
+                                          channel_filter=None, users=()):
+    """
+    删除 action（slot）中 bone_names（None 表示全部骨骼）骨骼曲线上的选中关键帧，参数同上；不标记刷新
+    channel_filter/users 同 _lookup_channel_fcurves，只处理编辑器中可见的通道
     """
     deleted_count = 0
-    selected_kfs = get_selected_keyframes(armature)
+    fcurves = _action_fcurves(action, slot)
+    if isinstance(data_path_keyword, str):
+        keywords = (data_path_keyword,)
+    else:
+        keywords = tuple(data_path_keyword)
 
-    for fcurve, kp_idx, kp in reversed(selected_kfs):
-        # 索引有效性检查
-        if kp_idx < 0 or kp_idx >= len(fcurve.keyframe_points):
-            continue
-        if fcurve.keyframe_points[kp_idx] != kp:
-            continue
-        # data_path 筛选
-        if data_path_keyword not in fcurve.data_path:
-            continue
-        # channel index 筛选
-        if indices is not None and fcurve.array_index not in indices:
-            continue
-        try:
-            fcurve.keyframe_points.remove(kp)
-            deleted_count += 1
-            # 清理空曲线
-            if len(fcurve.keyframe_points) == 0:
-                try:
-                    armature.animation_data.action.fcurves.remove(fcurve)
-                except Exception:
-                    pass
-        except Exception:
+    # 通道索引一次给出全部命中的骨骼曲线（骨骼、data_path 与 channel index 均已筛选）
+    for fcurve, keyword in _lookup_channel_fcurves(action, keywords, indices, slot=slot,
+                                                      bones_only=True, bone_names=bone_names,
+                                                      channel_filter=channel_filter, users=users):
+        if not fcurve.keyframe_points:
             continue
+        removed = _delete_selected_on_fcurve(fcurve)
+        deleted_count += removed
+        if removed and per_channel is not None:
+            key = (keyword, fcurve.array_index)
+            per_channel[key] = per_channel.get(key, 0) + removed
+        # 清理空曲线
+        if removed and len(fcurve.keyframe_points) == 0:
+            try:
+                fcurves.remove(fcurve)
+                _invalidate_channel_index(action)
+                _stats_add(empty_curves_removed=1)
+            except Exception:
+                pass
     return deleted_count
 
+def _is_pose_context(context):
+    obj = context.object
+    return bool(obj and obj.type == 'ARMATURE' and context.mode == 'POSE')
+
+def _pose_action_targets(context):
+    """
+    多物体 Pose 编辑：遍历 context.objects_in_mode 中的全部骨架，每个骨架只处理自己的选中骨骼
+    （所有骨架都没有选中骨骼时回退为全部骨骼）；共享同一 action/slot 的骨架合并为一组，只处理一次
+    返回 [(action, slot, 骨骼名集合, [骨架, ...]), ...]
+    """
+    rigs = [ob for ob in (getattr(context, "objects_in_mode", None) or [context.object])
+            if ob is not None and ob.type == 'ARMATURE']
+    selected = {}
+    for pb in context.selected_pose_bones or ():
+        selected.setdefault(pb.id_data.as_pointer(), set()).add(pb.name)
+    groups = {}
+    for rig in rigs:
+        action, slot = _action_and_slot(rig)
+        if action is None:
+            continue
+        if selected:
+            bone_names = selected.get(rig.as_pointer())
+            if not bone_names:
+                continue
+        else:
+            bone_names = {pb.name for pb in rig.pose.bones}
+        key = (action.as_pointer(), _slot_key(slot))
+        if key not in groups:
+            groups[key] = (action, slot, set(), [])
+        groups[key][2].update(bone_names)
+        groups[key][3].append(rig)
+    return list(groups.values())
+
 # ------------------------------
 # 来自“右键增强”插件的通用 fcurve 删除逻辑
 # ------------------------------
@@ -89,66 +754,71 @@ def _iter_target_objects(context):
         return [context.active_object]
     return []
 
-def _iter_fcurves_of_objects(objs):
+def _group_objects_by_action(objs):
+    """
+    按 (action 指针, slot) 分组物体：共享同一 action/slot 的多个物体（实例道具、群集角色）只处理一次
+    返回 [(action, slot, [物体, ...]), ...]，保持首次出现的顺序
+    """
+    groups = {}
     for ob in objs:
-        ad = getattr(ob, "animation_data", None)
-        if not (ad and ad.action):
+        action, slot = _action_and_slot(ob)
+        if action is None:
             continue
-        for fc in ad.action.fcurves:
-            yield ob, fc
+        key = (action.as_pointer(), _slot_key(slot))
+        if key not in groups:
+            groups[key] = (action, slot, [])
+        groups[key][2].append(ob)
+    return list(groups.values())
+
+def _action_label(action, slot=None):
+    return action.name if slot is None else f"{action.name}/{slot.name_display}"
 
 def _is_match_transform_channel(data_path, array_index, *, kinds: set, indices: set | None):
     """判断 fcurve 是否属于请求的 kinds（字符串集合）"""
     # kinds 中元素形如 "location", "scale", "rotation_euler", "rotation_quaternion"
-    if not any(k in data_path for k in ("location", "scale", "rotation_euler", "rotation_quaternion")):
-        return False
-    matched = False
-    for k in kinds:
-        if k in data_path:
-            matched = True
-            break
-    if not matched:
+    _bone, prop = _parse_data_path(data_path)
+    if prop not in TRANSFORM_KINDS or prop not in kinds:
         return False
+    if isinstance(indices, dict):
+        indices = indices.get(prop)
     if indices is None:
         return True
     return array_index in indices
 
-def _delete_selected_keyframes_from_fcurve(obj, fcurve, *, kinds: set, indices: set | None) -> int:
-    """删除单条 fcurve 上被选中的关键帧（对象通用）"""
-    if not fcurve or not fcurve.keyframe_points:
-        return 0
-    if not _is_match_transform_channel(fcurve.data_path, fcurve.array_index, kinds=kinds, indices=indices):
-        return 0
-    kps = fcurve.keyframe_points
-    sel_ids = [i for i, kp in enumerate(kps) if getattr(kp, "select_control_point", False)]
-    if not sel_ids:
-        return 0
-    removed = 0
-    for i in reversed(sel_ids):
-        try:
-            kps.remove(kps[i])
-            removed += 1
-        except Exception:
-            pass
-    return removed
-
-def _delete_selected_keyframes_for_objects(context, *, kinds: set, indices: set | None) -> int:
-    """在选中对象/活动对象上删除符合条件的选中关键帧"""
+def _delete_selected_keyframes_for_objects(context, *, kinds: set, indices: set | None, per_channel=None, per_action=None) -> int:
+    """
+    在选中对象/活动对象上删除符合条件的选中关键帧
+    同一 action（slot）只扫描、修改一次；传入 per_action（dict）时记录 {action 名: (删除数量, [使用该 action 的物体名])}
+    偏好设置开启“遵循编辑器通道过滤”时，只处理曲线编辑器/摄影表中可见的通道
+    """
     total = 0
     fcurves_to_remove = []
-    for ob in _iter_target_objects(context):
-        ad = getattr(ob, "animation_data", None)
-        if not (ad and ad.action):
-            continue
-        for fc in list(ad.action.fcurves):
-            removed = _delete_selected_keyframes_from_fcurve(ob, fc, kinds=kinds, indices=indices)
-            total += removed
+    channel_filter = _editor_channel_filter(context)
+    for action, slot, users in _group_objects_by_action(_iter_target_objects(context)):
+        action_removed = 0
+        fcurves = _action_fcurves(action, slot)
+        for fc, kind in _lookup_channel_fcurves(action, kinds, indices, slot=slot,
+                                                channel_filter=channel_filter, users=users):
+            if not fc.keyframe_points:
+                continue
+            removed = _delete_selected_on_fcurve(fc)
+            action_removed += removed
+            if removed and per_channel is not None:
+                key = (kind, fc.array_index)
+                per_channel[key] = per_channel.get(key, 0) + removed
             if removed and len(fc.keyframe_points) == 0:
-                fcurves_to_remove.append((ad.action.fcurves, fc))
+                fcurves_to_remove.append((action, fcurves, fc))
+        total += action_removed
+        if action_removed:
+            _mark_touched(action, *users)
+        if per_action is not None:
+            per_action[_action_label(action, slot)] = (action_removed, [ob.name for ob in users])
     # 删除空曲线
-    for fcurves, fc in fcurves_to_remove:
+    for action, fcurves, fc in fcurves_to_remove:
         try:
             fcurves.remove(fc)
+            _invalidate_channel_index(action)
+            _stats_add(empty_curves_removed=1)
         except Exception:
             pass
     return total
@@ -156,267 +826,649 @@ def _delete_selected_keyframes_for_objects(context, *, kinds: set, indices: set
 # ------------------------------
 # 统一删除接口：自动选择 armature(骨骼) 专用 或 通用对象逻辑
 # ------------------------------
-def delete_selected_keyframes_auto(context, *, kinds: set, indices: set | None):
+def delete_selected_keyframes_auto(context, *, kinds: set, indices: set | None, per_channel=None, per_action=None):
     """
     智能选择删除函数：
-    - 如果当前处于 Pose 模式且 active object 是 Armature，则使用 armature 专用删除（更精准）
+    - 如果当前处于 Pose 模式且 active object 是 Armature，则对 objects_in_mode 中的全部骨架使用骨骼专用删除（更精准）
     - 否则使用对象通用 fcurve 删除逻辑
-    返回实际删除数量（整数）
+    返回实际删除数量（整数）；传入 per_channel（dict）时按 (kind, array_index) 记录分通道数量，
+    传入 per_action（dict）时按 action 记录删除数量与使用者
     """
-    obj = context.object
-    # 判断是否 Pose 模式的骨骼清理
-    if obj and obj.type == 'ARMATURE' and context.mode == 'POSE':
-        armature = obj
-        target_bones = context.selected_pose_bones or armature.pose.bones
+    # 判断是否 Pose 模式的骨骼清理（多骨架同时进入 Pose 模式时一次处理全部）
+    if _is_pose_context(context):
         total = 0
-        # kinds 里可能含有多个条目（例如 rotation_euler 和 rotation_quaternion），逐项删除
-        for k in kinds:
-            # map k -> data_path keyword (we keep same names)
-            data_path_keyword = k
-            total += delete_selected_keyframes_for_armature(armature, target_bones, data_path_keyword, indices)
+        channel_filter = _editor_channel_filter(context)
+        for action, slot, bone_names, rigs in _pose_action_targets(context):
+            # kinds 里可能含有多个条目（例如 rotation_euler 和 rotation_quaternion），一次遍历内同时处理
+            removed = _delete_selected_keyframes_for_action(action, slot, bone_names, kinds, indices,
+                                                            per_channel=per_channel,
+                                                            channel_filter=channel_filter, users=rigs)
+            total += removed
+            if removed:
+                _mark_touched(action, *rigs)
+            if per_action is not None:
+                per_action[_action_label(action, slot)] = (removed, [rig.name for rig in rigs])
         return total
     else:
         # 通用对象/多物体删除
-        return _delete_selected_keyframes_for_objects(context, kinds=kinds, indices=indices)
+        return _delete_selected_keyframes_for_objects(context, kinds=kinds, indices=indices,
+                                                      per_channel=per_channel, per_action=per_action)
+
+def _collect_target_fcurves(context, *, kinds: set, indices):
+    """
+    按与 delete_selected_keyframes_auto 相同的规则收集目标曲线：
+    Pose 模式取各骨架选中骨骼的曲线，否则取选中物体的曲线（共享 action/slot 只收集一次）
+    返回 [(action, slot, [(fcurve, kind), ...], [使用者物体])]
+    """
+    channel_filter = _editor_channel_filter(context)
+    if _is_pose_context(context):
+        return [
+            (action, slot,
+             _lookup_channel_fcurves(action, kinds, indices, slot=slot, bones_only=True, bone_names=bone_names,
+                                     channel_filter=channel_filter, users=rigs),
+             rigs)
+            for action, slot, bone_names, rigs in _pose_action_targets(context)
+        ]
+    return [
+        (action, slot, _lookup_channel_fcurves(action, kinds, indices, slot=slot,
+                                               channel_filter=channel_filter, users=users), users)
+        for action, slot, users in _group_objects_by_action(_iter_target_objects(context))
+    ]
+
+_CHANNEL_LABELS = {
+    "location": "位置",
+    "rotation_euler": "Euler旋转",
+    "rotation_quaternion": "Quat旋转",
+    "scale": "缩放",
+}
+
+def _format_channel_counts(per_channel):
+    """把 {(kind, array_index): n} 格式化为报告文本，例如：位置X 3 / Quat旋转W 2"""
+    parts = []
+    for (kind, index), n in sorted(per_channel.items(), key=lambda item: (str(item[0][0]), item[0][1])):
+        axes = "WXYZ" if kind == "rotation_quaternion" else "XYZ"
+        axis = axes[index] if 0 <= index < len(axes) else str(index)
+        parts.append(f"{_CHANNEL_LABELS.get(kind, kind)}{axis} {n}")
+    return " / ".join(parts)
+
+def _format_action_counts(per_action):
+    """把 {action 名: (n, [物体名])} 格式化为报告文本，例如：Walk[Cube, Cube.001] 12"""
+    return " / ".join(f"{name}[{', '.join(users)}] {n}" for name, (n, users) in per_action.items() if n)
+
+def _format_report_detail(per_channel, per_action=None):
+    """组合分通道/分 action 明细，附加在操作报告末尾；无明细时返回空字符串"""
+    parts = []
+    if per_channel:
+        parts.append(_format_channel_counts(per_channel))
+    if per_action:
+        action_text = _format_action_counts(per_action)
+        if action_text:
+            parts.append(action_text)
+    return f"（{'；'.join(parts)}）" if parts else ""
 
 # ------------------------------
-# --- POSE 专用 Operators & 面板 (来自第一份插件)
+# 冗余关键帧精简（静止 / 线性 / 常量通道）
 # ------------------------------
-class POSE_OT_clear_location_all(Operator):
-    bl_idname = "pose.clear_location_all"
-    bl_label = "全部位置"
-    bl_options = {'REGISTER', 'UNDO'}
+# Keyframe.interpolation / handle_*_type 经 foreach_get 读出的整数值
+_IPO_CONSTANT, _IPO_LINEAR, _IPO_BEZIER = 0, 1, 2
+# 依赖相邻关键帧位置的手柄类型（AUTO / VECTOR / AUTO_CLAMPED）：邻居被删除后 update() 会重算它们
+_NEIGHBOUR_HANDLE_TYPES = (1, 2, 4)
+# 平台段规则允许的手柄类型（FREE / ALIGNED / AUTO_CLAMPED）：重算后手柄高度不会越过相邻关键帧
+_FLAT_HANDLE_TYPES = (0, 3, 4)
 
-    @classmethod
-    def poll(cls, context):
-        return context.object and context.object.type == 'ARMATURE' and context.mode == 'POSE'
+def _redundant_key_mask(co, tolerance, collapse_constant=True, *, interpolation, handle_left, handle_right,
+                        handle_left_type, handle_right_type, constant_extrapolation=True):
+    """
+    根据关键帧属性计算可删除的冗余关键帧掩码，删除后曲线与原曲线的偏差不超过 tolerance：
+    - 常量通道：值与 Bezier 手柄高度的变化都不超过 tolerance、只含 常量/线性/Bezier 插值且外插为常量时，
+      只保留第一帧（collapse_constant）；Bezier 段落在控制点凸包内，因此整条曲线都在容差内
+    - 线性段：只删除两侧相邻段都是 LINEAR 插值、且落在前后保留帧连线上（误差 ≤ tolerance）的中间帧；
+      Bezier/常量（阶梯）/缓动段从不跨越。保留帧若有依赖邻居的手柄（AUTO/VECTOR/AUTO_CLAMPED）
+      且另一侧是 Bezier 段，则不删除它的邻居，避免重算手柄改变那一段的形状
+    - 平台段：a、k、b 两侧都是 线性/Bezier 插值，a 的右手柄与 b 的左手柄为 FREE/ALIGNED/AUTO_CLAMPED，
+      且从 a 的前一保留帧到 b 的后一保留帧之间所有原始帧的值与手柄高度都在 tolerance 内时，删除 k；
+      新旧曲线都落在这条高度带内（含重算后的邻居手柄），偏差不超过带宽
+    每轮只删除互不相邻的候选帧，并用 np.interp 校验被跨过的所有原始帧仍在容差内
+    （线性段上最大偏差出现在原始关键帧处），因此连续冗余帧会逐轮合并，误差不会累积
+    """
+    n = len(co)
+    remove = np.zeros(n, dtype=bool)
+    if n < 2:
+        return remove
+    frames = co[:, 0].astype(np.float64)
+    values = co[:, 1].astype(np.float64)
+    interpolation = np.asarray(interpolation).ravel()
+    if collapse_constant and constant_extrapolation:
+        heights = np.concatenate([values, handle_left[:, 1], handle_right[:, 1]])
+        plain = np.isin(interpolation[:-1], (_IPO_CONSTANT, _IPO_LINEAR, _IPO_BEZIER)).all()
+        if plain and np.ptp(heights) <= tolerance:
+            remove[1:] = True
+            return remove
+    if n < 3:
+        return remove
 
-    def execute(self, context):
-        armature = context.object
-        target_bones = context.selected_pose_bones or armature.pose.bones
-        deleted = delete_selected_keyframes_for_armature(armature, target_bones, "location", [0,1,2])
-        if deleted == 0:
-            self.report({'INFO'}, "未选中任何位置关键帧")
-        else:
-            self.report({'INFO'}, f"成功删除 {deleted} 个位置关键帧（选中项）")
-        refresh_animation_views()
-        return {'FINISHED'}
+    linear = interpolation == _IPO_LINEAR
+    bezier = interpolation == _IPO_BEZIER
+    left_types = np.asarray(handle_left_type).ravel()
+    right_types = np.asarray(handle_right_type).ravel()
+    left_dep = np.isin(left_types, _NEIGHBOUR_HANDLE_TYPES)
+    right_dep = np.isin(right_types, _NEIGHBOUR_HANDLE_TYPES)
+    # 平台段规则：每帧的值与两侧手柄高度的上下界
+    key_heights = np.stack([values, handle_left[:, 1], handle_right[:, 1]]).astype(np.float64)
+    key_hi, key_lo = key_heights.max(axis=0), key_heights.min(axis=0)
+    smooth = linear | bezier
+    flat_left = np.isin(left_types, _FLAT_HANDLE_TYPES)
+    flat_right = np.isin(right_types, _FLAT_HANDLE_TYPES)
+    keep = np.ones(n, dtype=bool)
+    while True:
+        idx = np.flatnonzero(keep)
+        if len(idx) < 3:
+            break
+        a, k, b = idx[:-2], idx[1:-1], idx[2:]
+        f0, f1, f2 = frames[a], frames[k], frames[b]
+        v0, v1, v2 = values[a], values[k], values[b]
+        span = f2 - f0
+        t = np.divide(f1 - f0, span, out=np.zeros_like(span), where=span != 0)
+        residual = np.abs(v1 - (v0 + (v2 - v0) * t))
+        # 被删帧两侧都是线性段，删除后 a→b 仍按 a 的 LINEAR 插值画直线
+        candidate = (residual <= tolerance) & linear[a] & linear[k]
+        # a 的左手柄 / b 的右手柄会随邻居变化重算，只有对应一侧不是 Bezier 段时才安全
+        prev_bezier = np.r_[False, bezier[idx[:-3]]]
+        next_bezier = np.r_[bezier[b[:-1]], False]
+        candidate &= ~(prev_bezier & left_dep[a]) & ~(next_bezier & right_dep[b])
+        # 平台段：高度带取 a 的前一保留帧到 b 的后一保留帧（含两端）之间的所有原始帧，
+        # 这样 a 的左手柄 / b 的右手柄重算后也不会离开这条带
+        seg_hi = np.maximum(np.maximum.reduceat(key_hi, idx)[:-1], key_hi[idx[1:]])
+        seg_lo = np.minimum(np.minimum.reduceat(key_lo, idx)[:-1], key_lo[idx[1:]])
+        seg_hi = np.r_[-np.inf, seg_hi, -np.inf]
+        seg_lo = np.r_[np.inf, seg_lo, np.inf]
+        band_hi = np.maximum.reduce([seg_hi[:-3], seg_hi[1:-2], seg_hi[2:-1], seg_hi[3:]])
+        band_lo = np.minimum.reduce([seg_lo[:-3], seg_lo[1:-2], seg_lo[2:-1], seg_lo[3:]])
+        flat = (band_hi - band_lo <= tolerance) & smooth[a] & smooth[k] & flat_right[a] & flat_left[b]
+        candidate |= flat
+        if not constant_extrapolation:
+            # 线性外插沿首/末段斜率延伸，首尾段的端点帧保持不动
+            candidate[0] = candidate[-1] = False
+        # 相邻候选只取其一（奇偶交替），保证每个候选两侧的保留帧在本轮不变
+        run_start = np.r_[True, ~candidate[:-1]]
+        run_id = np.cumsum(run_start)
+        first_in_run = np.flatnonzero(run_start)
+        pos_in_run = np.arange(len(candidate)) - first_in_run[run_id - 1]
+        candidate &= (pos_in_run % 2) == 0
+        chosen = k[candidate]
+        if not len(chosen):
+            break
 
-class POSE_OT_clear_location_x(Operator):
-    bl_idname = "pose.clear_location_x"
-    bl_label = "X位置"
-    bl_options = {'REGISTER', 'UNDO'}
-    @classmethod
-    def poll(cls, context):
-        return context.object and context.object.type == 'ARMATURE' and context.mode == 'POSE'
-    def execute(self, context):
-        armature = context.object
-        target_bones = context.selected_pose_bones or armature.pose.bones
-        deleted = delete_selected_keyframes_for_armature(armature, target_bones, "location", [0])
-        if deleted == 0:
-            self.report({'INFO'}, "未选中任何X位置关键帧")
-        else:
-            self.report({'INFO'}, f"成功删除 {deleted} 个X位置关键帧（选中项）")
-        refresh_animation_views()
-        return {'FINISHED'}
+        trial = keep.copy()
+        trial[chosen] = False
+        kept_idx = np.flatnonzero(trial)
+        error = np.abs(values - np.interp(frames, frames[kept_idx], values[kept_idx]))
+        bad_segments = np.unique(np.searchsorted(kept_idx, np.flatnonzero(error > tolerance), side='right') - 1)
+        if len(bad_segments):
+            chosen_segments = np.searchsorted(kept_idx, chosen, side='right') - 1
+            chosen = chosen[~np.isin(chosen_segments, bad_segments)]
+            if not len(chosen):
+                break
+            trial = keep.copy()
+            trial[chosen] = False
+        keep = trial
 
-class POSE_OT_clear_location_y(Operator):
-    bl_idname = "pose.clear_location_y"
-    bl_label = "Y位置"
-    bl_options = {'REGISTER', 'UNDO'}
-    @classmethod
-    def poll(cls, context):
-        return context.object and context.object.type == 'ARMATURE' and context.mode == 'POSE'
-    def execute(self, context):
-        armature = context.object
-        target_bones = context.selected_pose_bones or armature.pose.bones
-        deleted = delete_selected_keyframes_for_armature(armature, target_bones, "location", [1])
-        if deleted == 0:
-            self.report({'INFO'}, "未选中任何Y位置关键帧")
-        else:
-            self.report({'INFO'}, f"成功删除 {deleted} 个Y位置关键帧（选中项）")
-        refresh_animation_views()
-        return {'FINISHED'}
+    remove = ~keep
+    return remove
 
-class POSE_OT_clear_location_z(Operator):
-    bl_idname = "pose.clear_location_z"
-    bl_label = "Z位置"
-    bl_options = {'REGISTER', 'UNDO'}
-    @classmethod
-    def poll(cls, context):
-        return context.object and context.object.type == 'ARMATURE' and context.mode == 'POSE'
-    def execute(self, context):
-        armature = context.object
-        target_bones = context.selected_pose_bones or armature.pose.bones
-        deleted = delete_selected_keyframes_for_armature(armature, target_bones, "location", [2])
-        if deleted == 0:
-            self.report({'INFO'}, "未选中任何Z位置关键帧")
-        else:
-            self.report({'INFO'}, f"成功删除 {deleted} 个Z位置关键帧（选中项）")
-        refresh_animation_views()
-        return {'FINISHED'}
+def decimate_redundant_keyframes(fcurve, tolerance=0.001, collapse_constant=True) -> int:
+    """
+    删除单条 fcurve 上的冗余关键帧，返回删除数量；无 numpy 或属性读不全时返回 0
+    一次 foreach_get 读出坐标、插值与手柄，判定后直接用同一份数据重建
+    """
+    if np is None:
+        return 0
+    start = time.perf_counter()
+    n = len(fcurve.keyframe_points)
+    attrs = _read_keyframe_attrs(fcurve)
+    if attrs is None:
+        return 0
+    data = dict(attrs)
+    mask = _redundant_key_mask(
+        data["co"], tolerance, collapse_constant,
+        interpolation=data["interpolation"],
+        handle_left=data["handle_left"], handle_right=data["handle_right"],
+        handle_left_type=data["handle_left_type"], handle_right_type=data["handle_right_type"],
+        constant_extrapolation=fcurve.extrapolation == 'CONSTANT',
+    )
+    scanned = time.perf_counter()
+    removed = int(np.count_nonzero(mask))
+    if removed:
+        keep = ~mask
+        _write_keyframe_attrs(fcurve, [(attr, buf[keep]) for attr, buf in attrs], n - removed)
+    _stats_add(curves_scanned=1, keys_inspected=n, keys_deleted=removed,
+               scan_time=scanned - start, delete_time=time.perf_counter() - scanned)
+    return removed
 
-class POSE_OT_clear_rot_quat_all(Operator):
-    bl_idname = "pose.clear_rot_quat_all"
-    bl_label = "全部Quat旋转"  # 统一名称：添加Quat标识
-    bl_options = {'REGISTER', 'UNDO'}
-    @classmethod
-    def poll(cls, context):
-        return context.object and context.object.type == 'ARMATURE' and context.mode == 'POSE'
-    def execute(self, context):
-        armature = context.object
-        target_bones = context.selected_pose_bones or armature.pose.bones
-        deleted = delete_selected_keyframes_for_armature(armature, target_bones, "rotation_quaternion", [0,1,2,3])
-        if deleted == 0:
-            self.report({'INFO'}, "未选中任何旋转关键帧")
-        else:
-            self.report({'INFO'}, f"成功删除 {deleted} 个旋转关键帧（选中项）")
-        refresh_animation_views()
-        return {'FINISHED'}
+# ------------------------------
+# 无界面删除核心（命令行批处理使用）
+# ------------------------------
+def clean_keyframes_in_file(kinds, indices=None, *, selected_only=False):
+    """
+    在当前打开的 .blend 中按通道删除所有物体动画上的关键帧（不依赖 context/界面）
+    selected_only: True 只删选中关键帧；False 删除匹配通道上的全部关键帧（整条曲线移除）
+    返回 {action 标签: {"removed": n, "users": [物体名]}}
+    """
+    summary = {}
+    for action, slot, users in _group_objects_by_action(bpy.data.objects):
+        fcurves = _action_fcurves(action, slot)
+        removed_total = 0
+        for fc, _kind in _lookup_channel_fcurves(action, kinds, indices, slot=slot):
+            if selected_only:
+                removed = _delete_selected_on_fcurve(fc)
+            else:
+                removed = len(fc.keyframe_points)
+            removed_total += removed
+            if not selected_only or (removed and len(fc.keyframe_points) == 0):
+                fcurves.remove(fc)
+                _invalidate_channel_index(action)
+        if removed_total:
+            summary[_action_label(action, slot)] = {"removed": removed_total, "users": [ob.name for ob in users]}
+    return summary
 
-class POSE_OT_clear_rot_quat_w(Operator):
-    bl_idname = "pose.clear_rot_quat_w"
-    bl_label = "Quat W旋转"  # 统一名称：添加Quat标识
-    bl_options = {'REGISTER', 'UNDO'}
-    @classmethod
-    def poll(cls, context):
-        return context.object and context.object.type == 'ARMATURE' and context.mode == 'POSE'
-    def execute(self, context):
-        armature = context.object
-        target_bones = context.selected_pose_bones or armature.pose.bones
-        deleted = delete_selected_keyframes_for_armature(armature, target_bones, "rotation_quaternion", [0])
-        if deleted == 0:
-            self.report({'INFO'}, "未选中任何W旋转关键帧")
-        else:
-            self.report({'INFO'}, f"成功删除 {deleted} 个W旋转关键帧（选中项）")
-        refresh_animation_views()
-        return {'FINISHED'}
+# ------------------------------
+# 全文件清理：遍历 bpy.data.actions（含 NLA、形态键、材质/灯光/相机数据、节点树的 action）
+# ------------------------------
+# 可能带动画数据的 ID 集合；旧版本缺少的集合会被跳过
+_ANIMATABLE_COLLECTIONS = (
+    "objects", "meshes", "curves", "armatures", "lattices", "metaballs", "shape_keys",
+    "materials", "textures", "lights", "cameras", "speakers", "worlds", "scenes",
+    "node_groups", "particles", "grease_pencils", "hair_curves", "pointclouds", "volumes",
+    "linestyles", "movieclips", "masks", "cache_files",
+)
 
-class POSE_OT_clear_rot_quat_x(Operator):
-    bl_idname = "pose.clear_rot_quat_x"
-    bl_label = "Quat X旋转"  # 统一名称：添加Quat标识
-    bl_options = {'REGISTER', 'UNDO'}
-    @classmethod
-    def poll(cls, context):
-        return context.object and context.object.type == 'ARMATURE' and context.mode == 'POSE'
-    def execute(self, context):
-        armature = context.object
-        target_bones = context.selected_pose_bones or armature.pose.bones
-        deleted = delete_selected_keyframes_for_armature(armature, target_bones, "rotation_quaternion", [1])
-        if deleted == 0:
-            self.report({'INFO'}, "未选中任何X旋转关键帧")
-        else:
-            self.report({'INFO'}, f"成功删除 {deleted} 个X旋转关键帧（选中项）")
-        refresh_animation_views()
-        return {'FINISHED'}
+def _iter_nla_strips(strips):
+    """递归遍历 NLA 片段（含 meta 片段内的子片段）"""
+    for strip in strips:
+        yield strip
+        yield from _iter_nla_strips(strip.strips)
 
-class POSE_OT_clear_rot_quat_y(Operator):
-    bl_idname = "pose.clear_rot_quat_y"
-    bl_label = "Quat Y旋转"  # 统一名称：添加Quat标识
-    bl_options = {'REGISTER', 'UNDO'}
-    @classmethod
-    def poll(cls, context):
-        return context.object and context.object.type == 'ARMATURE' and context.mode == 'POSE'
-    def execute(self, context):
-        armature = context.object
-        target_bones = context.selected_pose_bones or armature.pose.bones
-        deleted = delete_selected_keyframes_for_armature(armature, target_bones, "rotation_quaternion", [2])
-        if deleted == 0:
-            self.report({'INFO'}, "未选中任何Y旋转关键帧")
-        else:
-            self.report({'INFO'}, f"成功删除 {deleted} 个Y旋转关键帧（选中项）")
-        refresh_animation_views()
-        return {'FINISHED'}
+def build_action_owner_index(owner_ids=None):
+    """
+    一次性建立 action -> 使用者 的索引：{action.as_pointer(): [使用者标签, ...]}
+    使用者包括活动 action、NLA 片段，以及材质/灯光/世界等内嵌节点树的动画数据
+    owner_ids: 可选 dict，同时填入 {action.as_pointer(): [使用者 ID, ...]}（用于解析 data_path）
+    """
+    owners = {}
+    for coll_name in _ANIMATABLE_COLLECTIONS:
+        for id_data in getattr(bpy.data, coll_name, ()):
+            label = f"{type(id_data).__name__}:{id_data.name}"
+            candidates = [(id_data, label)]
+            node_tree = getattr(id_data, "node_tree", None)
+            if node_tree is not None:
+                candidates.append((node_tree, f"{label}(节点树)"))
+            for owner, owner_label in candidates:
+                ad = getattr(owner, "animation_data", None)
+                if not ad:
+                    continue
+                if ad.action:
+                    owners.setdefault(ad.action.as_pointer(), []).append(owner_label)
+                    if owner_ids is not None:
+                        owner_ids.setdefault(ad.action.as_pointer(), []).append(owner)
+                for track in ad.nla_tracks:
+                    for strip in _iter_nla_strips(track.strips):
+                        if strip.action:
+                            owners.setdefault(strip.action.as_pointer(), []).append(
+                                f"{owner_label} NLA[{track.name}/{strip.name}]")
+                            if owner_ids is not None:
+                                owner_ids.setdefault(strip.action.as_pointer(), []).append(owner)
+    return owners
 
-class POSE_OT_clear_rot_quat_z(Operator):
-    bl_idname = "pose.clear_rot_quat_z"
-    bl_label = "Quat Z旋转"  # 统一名称：添加Quat标识
-    bl_options = {'REGISTER', 'UNDO'}
-    @classmethod
-    def poll(cls, context):
-        return context.object and context.object.type == 'ARMATURE' and context.mode == 'POSE'
-    def execute(self, context):
-        armature = context.object
-        target_bones = context.selected_pose_bones or armature.pose.bones
-        deleted = delete_selected_keyframes_for_armature(armature, target_bones, "rotation_quaternion", [3])
-        if deleted == 0:
-            self.report({'INFO'}, "未选中任何Z旋转关键帧")
-        else:
-            self.report({'INFO'}, f"成功删除 {deleted} 个Z旋转关键帧（选中项）")
-        refresh_animation_views()
-        return {'FINISHED'}
+def _iter_action_fcurve_collections(action):
+    """遍历 action 的全部 F-curve 集合：分层 action 逐个 channelbag（所有 slot），传统 action 为 action.fcurves"""
+    if getattr(action, "is_action_layered", False):
+        for layer in action.layers:
+            for strip in layer.strips:
+                for channelbag in getattr(strip, "channelbags", ()):
+                    yield channelbag.fcurves
+    else:
+        yield action.fcurves
 
-class POSE_OT_clear_scale_all(Operator):
-    bl_idname = "pose.clear_scale_all"
-    bl_label = "全部缩放"
-    bl_options = {'REGISTER', 'UNDO'}
-    @classmethod
-    def poll(cls, context):
-        return context.object and context.object.type == 'ARMATURE' and context.mode == 'POSE'
-    def execute(self, context):
-        armature = context.object
-        target_bones = context.selected_pose_bones or armature.pose.bones
-        deleted = delete_selected_keyframes_for_armature(armature, target_bones, "scale", [0,1,2])
-        if deleted == 0:
-            self.report({'INFO'}, "未选中任何缩放关键帧")
-        else:
-            self.report({'INFO'}, f"成功删除 {deleted} 个缩放关键帧（选中项）")
-        refresh_animation_views()
-        return {'FINISHED'}
+def _is_float_channel(fcurve, owners):
+    """
+    通过任一使用者解析 data_path，判断曲线驱动的是否为浮点属性；
+    布尔/整数/枚举属性（可见性开关、约束目标选择等）以及无法解析的曲线返回 False
+    """
+    for owner in owners:
+        try:
+            value = owner.path_resolve(fcurve.data_path)
+        except (ValueError, AttributeError):
+            continue
+        if not isinstance(value, (str, bool, int, float)):
+            try:
+                value = value[fcurve.array_index]
+            except (TypeError, IndexError, KeyError):
+                continue
+        return isinstance(value, float)
+    return False
+
+def _has_constant_interpolation(fcurve):
+    """曲线中是否有常量（阶梯）插值的关键帧"""
+    kps = fcurve.keyframe_points
+    buf = np.empty(len(kps), dtype=np.int32)
+    kps.foreach_get("interpolation", buf)
+    return bool(np.any(buf == _IPO_CONSTANT))
+
+SWEEP_OPERATION_ITEMS = [
+    ('SELECTED', "删除选中关键帧", "删除匹配通道上处于选中状态的关键帧"),
+    ('REDUNDANT', "精简冗余关键帧", "删除静止段、线性段与常量通道中的冗余关键帧"),
+]
+
+def sweep_file_actions(operation, *, kinds=None, indices=None, tolerance=0.001, collapse_constant=True):
+    """
+    对当前文件中的每个 action 恰好处理一次
+    kinds: None 表示任意通道（含形态键、材质、节点等 data_path），否则只处理这些变换通道
+    REDUNDANT 时始终跳过含常量（阶梯）插值的曲线，以及非浮点属性（布尔/整数/枚举）或无法解析的曲线
+    返回 [(action 名, [使用者标签], 删除数量)]，只包含有删除的 action
+    """
+    owner_ids = {}
+    owners = build_action_owner_index(owner_ids)
+    report = []
+    for action in bpy.data.actions:
+        action_owners = owner_ids.get(action.as_pointer(), [])
+        removed_total = 0
+        for fcurves in _iter_action_fcurve_collections(action):
+            empty = []
+            for fc in list(fcurves):
+                if kinds is not None and not _is_match_transform_channel(
+                        fc.data_path, fc.array_index, kinds=kinds, indices=indices):
+                    continue
+                if not fc.keyframe_points:
+                    continue
+                if operation == 'REDUNDANT':
+                    if _has_constant_interpolation(fc) or not _is_float_channel(fc, action_owners):
+                        continue
+                    removed = decimate_redundant_keyframes(fc, tolerance, collapse_constant)
+                else:
+                    removed = _delete_selected_on_fcurve(fc)
+                    if removed and len(fc.keyframe_points) == 0:
+                        empty.append(fc)
+                removed_total += removed
+            for fc in empty:
+                fcurves.remove(fc)
+            _stats_add(empty_curves_removed=len(empty))
+        if removed_total:
+            _invalidate_channel_index(action)
+            _mark_touched(action)
+            report.append((action.name, owners.get(action.as_pointer(), []), removed_total))
+    return report
+
+# ------------------------------
+# 通道删除 Operator（单个参数化 Operator，取代原先每个通道/分量一个类）
+# Pose 模式下通过 delete_selected_keyframes_auto 自动走骨骼专用逻辑（只处理选中骨骼）
+# ------------------------------
+CHANNEL_KIND_ITEMS = [
+    ('location', "位置", "位置通道"),
+    ('rotation', "旋转(Euler/Quat)", "Euler 与四元数旋转通道"),
+    ('rotation_euler', "Euler旋转", "Euler 旋转通道"),
+    ('rotation_quaternion', "Quat旋转", "四元数旋转通道"),
+    ('scale', "缩放", "缩放通道"),
+]
+
+# kind 属性 -> 实际匹配的 data_path 属性集合
+_KIND_TARGETS = {
+    'location': {"location"},
+    'rotation': {"rotation_euler", "rotation_quaternion"},
+    'rotation_euler': {"rotation_euler"},
+    'rotation_quaternion': {"rotation_quaternion"},
+    'scale': {"scale"},
+}
+
+# 单分量文字格式
+_AXIS_LABEL_FORMATS = {
+    'location': "{axis}位置",
+    'rotation': "{axis}旋转",
+    'rotation_euler': "Euler {axis}旋转",
+    'rotation_quaternion': "Quat {axis}旋转",
+    'scale': "{axis}缩放",
+}
+
+def _channel_label(kind, index):
+    """通道按钮/报告文字，例如 ('location', 0) -> X位置，('rotation_quaternion', -1) -> 全部Quat旋转"""
+    if index < 0:
+        name = next(name for ident, name, _desc in CHANNEL_KIND_ITEMS if ident == kind)
+        return f"全部{name}"
+    axes = "WXYZ" if kind == 'rotation_quaternion' else "XYZ"
+    return _AXIS_LABEL_FORMATS[kind].format(axis=axes[index] if index < len(axes) else index)
+
+class ANIM_OT_clean_channel_keys(Operator):
+    bl_idname = "anim.clean_channel_keys"
+    bl_label = "删除选中通道关键帧"
+    bl_options = {"REGISTER", "UNDO"}
+
+    kind: bpy.props.EnumProperty(
+        name="通道",
+        items=CHANNEL_KIND_ITEMS,
+        default='location',
+    )
+    index: bpy.props.IntProperty(
+        name="分量",
+        description="-1 表示全部分量",
+        default=-1,
+        min=-1,
+        max=3,
+    )
 
-class POSE_OT_clear_scale_x(Operator):
-    bl_idname = "pose.clear_scale_x"
-    bl_label = "X缩放"
-    bl_options = {'REGISTER', 'UNDO'}
     @classmethod
-    def poll(cls, context):
-        return context.object and context.object.type == 'ARMATURE' and context.mode == 'POSE'
+    def description(cls, context, properties):
+        return f"删除选中的{_channel_label(properties.kind, properties.index)}关键帧（Pose 模式只处理选中骨骼）"
+
+    @_record_run
     def execute(self, context):
-        armature = context.object
-        target_bones = context.selected_pose_bones or armature.pose.bones
-        deleted = delete_selected_keyframes_for_armature(armature, target_bones, "scale", [0])
-        if deleted == 0:
-            self.report({'INFO'}, "未选中任何X缩放关键帧")
+        label = _channel_label(self.kind, self.index)
+        indices = None if self.index < 0 else {self.index}
+        per_channel, per_action = {}, {}
+        n = delete_selected_keyframes_auto(context, kinds=_KIND_TARGETS[self.kind], indices=indices,
+                                           per_channel=per_channel, per_action=per_action)
+        if n == 0:
+            self.report({'INFO'}, f"未选中任何{label}关键帧")
         else:
-            self.report({'INFO'}, f"成功删除 {deleted} 个X缩放关键帧（选中项）")
+            detail = _format_report_detail(per_channel, per_action) if self.index < 0 else ""
+            self.report({'INFO'}, f"已删除{label}关键帧: {n}{detail}")
         refresh_animation_views()
         return {'FINISHED'}
 
-class POSE_OT_clear_scale_y(Operator):
-    bl_idname = "pose.clear_scale_y"
-    bl_label = "Y缩放"
-    bl_options = {'REGISTER', 'UNDO'}
-    @classmethod
-    def poll(cls, context):
-        return context.object and context.object.type == 'ARMATURE' and context.mode == 'POSE'
-    def execute(self, context):
-        armature = context.object
-        target_bones = context.selected_pose_bones or armature.pose.bones
-        deleted = delete_selected_keyframes_for_armature(armature, target_bones, "scale", [1])
-        if deleted == 0:
-            self.report({'INFO'}, "未选中任何Y缩放关键帧")
-        else:
-            self.report({'INFO'}, f"成功删除 {deleted} 个Y缩放关键帧（选中项）")
-        refresh_animation_views()
+class ANIM_OT_clean_channel_keys_modal(Operator):
+    bl_idname = "anim.clean_channel_keys_modal"
+    bl_label = "分块删除选中通道关键帧"
+    bl_description = "按时间预算分块处理 F-curve，状态栏显示进度，Esc 取消并完整回滚；结束时只产生一个撤销步骤"
+    bl_options = {"REGISTER", "UNDO"}
+
+    kind: bpy.props.EnumProperty(
+        name="通道",
+        items=CHANNEL_KIND_ITEMS,
+        default='location',
+    )
+    index: bpy.props.IntProperty(
+        name="分量",
+        description="-1 表示全部分量",
+        default=-1,
+        min=-1,
+        max=3,
+    )
+    time_budget_ms: bpy.props.FloatProperty(
+        name="每块时间预算 (ms)",
+        default=30.0,
+        min=1.0,
+        max=1000.0,
+    )
+
+    def invoke(self, context, event):
+        if np is None:
+            self.report({'ERROR'}, "分块删除需要 NumPy")
+            return {'CANCELLED'}
+        indices = None if self.index < 0 else {self.index}
+        self._queue = []
+        for action, slot, matches, users in _collect_target_fcurves(
+                context, kinds=_KIND_TARGETS[self.kind], indices=indices):
+            fcurves = _action_fcurves(action, slot)
+            self._queue.extend((action, fcurves, fc, users) for fc, _kind in matches)
+        if not self._queue:
+            self.report({'INFO'}, f"未选中任何{_channel_label(self.kind, self.index)}关键帧")
+            return {'CANCELLED'}
+        self._total = len(self._queue)
+        self._position = 0
+        self._removed = 0
+        # 回滚快照：(fcurve, 原始属性, 原始帧数)，只记录实际改动过的曲线
+        self._snapshots = []
+        # 走逐帧回退、无法回滚的曲线（as_pointer）
+        self._unrestorable = []
+        # 分块执行跨越多次 modal 调用，统计直接记在自身上，完成时写入运行记录
+        self._stats = _RunStats(f"{_run_label(self)}（分块）")
+        self._start = time.perf_counter()
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.01, window=context.window)
+        wm.progress_begin(0, self._total)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def _process_chunk(self):
+        deadline = time.perf_counter() + self.time_budget_ms / 1000.0
+        while self._position < self._total and time.perf_counter() < deadline:
+            _action, _fcurves, fc, _users = self._queue[self._position]
+            self._position += 1
+            n = len(fc.keyframe_points)
+            if not n:
+                continue
+            start = time.perf_counter()
+            # 先只读选中标记，完整属性快照只对确有选中帧的曲线读取
+            selected = _selected_keyframe_indices(fc)
+            self._stats.add(curves_scanned=1, keys_inspected=n, scan_time=time.perf_counter() - start)
+            if not selected:
+                continue
+            start = time.perf_counter()
+            attrs = _read_keyframe_attrs(fc)
+            if attrs is None:
+                # 属性读不全时无法无损重建与快照：逐帧 remove()，这些曲线取消时不能回滚
+                removed = _remove_keyframes_per_key(fc, selected)
+                self._unrestorable.append(fc.as_pointer())
+                self._removed += removed
+                self._stats.add(keys_deleted=removed, delete_time=time.perf_counter() - start)
+                continue
+            keep = np.ones(n, dtype=bool)
+            keep[selected] = False
+            kept = int(np.count_nonzero(keep))
+            self._snapshots.append((fc, attrs, n))
+            _write_keyframe_attrs(fc, [(attr, buf[keep]) for attr, buf in attrs], kept)
+            self._removed += n - kept
+            self._stats.add(keys_deleted=n - kept, delete_time=time.perf_counter() - start)
+
+    def _finish(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+
+    def _rollback(self):
+        for fc, attrs, n in reversed(self._snapshots):
+            _write_keyframe_attrs(fc, attrs, n)
+        self._snapshots.clear()
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self._rollback()
+            self._finish(context)
+            if self._unrestorable:
+                self.report({'WARNING'}, f"已取消，关键帧已恢复（{len(self._unrestorable)} 条曲线属性读取失败，无法回滚）")
+            else:
+                self.report({'WARNING'}, "已取消，关键帧已恢复")
+            refresh_animation_views()
+            return {'CANCELLED'}
+        if event.type != 'TIMER':
+            return {'RUNNING_MODAL'}
+
+        self._process_chunk()
+        context.window_manager.progress_update(self._position)
+        context.workspace.status_text_set(
+            f"删除{_channel_label(self.kind, self.index)}关键帧：{self._position}/{self._total} 条曲线，"
+            f"已删除 {self._removed}（Esc 取消）")
+        if self._position < self._total:
+            return {'RUNNING_MODAL'}
+
+        # 全部完成后才移除空曲线，保证取消时可以完整回滚
+        edited = {fc.as_pointer() for fc, _attrs, _n in self._snapshots}
+        edited.update(self._unrestorable)
+        for action, fcurves, fc, users in self._queue:
+            if fc.as_pointer() in edited and len(fc.keyframe_points) == 0:
+                fcurves.remove(fc)
+                _invalidate_channel_index(action)
+                self._stats.add(empty_curves_removed=1)
+        for action, _fcurves, _fc, users in self._queue:
+            _mark_touched(action, *users)
+        self._finish(context)
+        self.report({'INFO'}, f"已删除{_channel_label(self.kind, self.index)}关键帧: {self._removed}")
+        self._stats.add(refresh_time=refresh_animation_views())
+        self._stats.total_time = time.perf_counter() - self._start
+        _push_run(self._stats)
         return {'FINISHED'}
 
-class POSE_OT_clear_scale_z(Operator):
-    bl_idname = "pose.clear_scale_z"
-    bl_label = "Z缩放"
-    bl_options = {'REGISTER', 'UNDO'}
-    @classmethod
-    def poll(cls, context):
-        return context.object and context.object.type == 'ARMATURE' and context.mode == 'POSE'
-    def execute(self, context):
-        armature = context.object
-        target_bones = context.selected_pose_bones or armature.pose.bones
-        deleted = delete_selected_keyframes_for_armature(armature, target_bones, "scale", [2])
-        if deleted == 0:
-            self.report({'INFO'}, "未选中任何Z缩放关键帧")
+# 菜单/面板数据表：str 为标题，None 为分隔线，(kind, index, 文字) 为按钮
+CHANNEL_MENU_ROWS = {
+    'LOCATION': [
+        ('location', -1, "全部XYZ位置"), None,
+        ('location', 0, "X位置"), ('location', 1, "Y位置"), ('location', 2, "Z位置"),
+    ],
+    'ROTATION_EULER': [
+        "Euler旋转", None,
+        ('rotation', -1, "全部Euler旋转"), None,
+        ('rotation_euler', 0, "X旋转"), ('rotation_euler', 1, "Y旋转"), ('rotation_euler', 2, "Z旋转"),
+    ],
+    'ROTATION_QUAT': [
+        "Quaternion四元数", None,
+        ('rotation_quaternion', -1, "全部WXYZ四元数"), None,
+        ('rotation_quaternion', 0, "W值"), ('rotation_quaternion', 1, "X值"),
+        ('rotation_quaternion', 2, "Y值"), ('rotation_quaternion', 3, "Z值"),
+    ],
+    'SCALE': [
+        ('scale', -1, "全部XYZ缩放"), None,
+        ('scale', 0, "X缩放"), ('scale', 1, "Y缩放"), ('scale', 2, "Z缩放"),
+    ],
+}
+
+# Pose 面板分组：(标题, 图标, kind, 分量数, 全部按钮文字)
+POSE_PANEL_SECTIONS = (
+    ("位置关键帧:", 'ORIENTATION_LOCAL', 'location', 3, "全部位置"),
+    ("旋转关键帧:", 'ORIENTATION_GIMBAL', 'rotation_quaternion', 4, "全部Quat旋转"),
+    ("缩放关键帧:", 'FULLSCREEN_ENTER', 'scale', 3, "全部缩放"),
+)
+
+def _get_stats_rows():
+    try:
+        return bpy.context.preferences.addons[__name__].preferences.stats_rows
+    except Exception:
+        return 5
+
+def _use_chunked_delete():
+    try:
+        return bpy.context.preferences.addons[__name__].preferences.chunked_delete
+    except Exception:
+        return False
+
+def _channel_op(layout, kind, index, text):
+    # 偏好设置开启分块删除时，菜单/面板按钮改用可取消的 modal 版本
+    op_cls = ANIM_OT_clean_channel_keys_modal if _use_chunked_delete() else ANIM_OT_clean_channel_keys
+    op = layout.operator(op_cls.bl_idname, text=text)
+    op.kind = kind
+    op.index = index
+    return op
+
+def _draw_channel_rows(layout, rows, counts=None):
+    """counts 为 _selected_key_counts 的结果时，按钮文字后附加将被删除的选中关键帧数"""
+    for row in rows:
+        if row is None:
+            layout.separator()
+        elif isinstance(row, str):
+            layout.label(text=row)
+        elif counts is None:
+            _channel_op(layout, *row)
         else:
-            self.report({'INFO'}, f"成功删除 {deleted} 个Z缩放关键帧（选中项）")
-        refresh_animation_views()
-        return {'FINISHED'}
+            kind, index, text = row
+            _channel_op(layout, kind, index, f"{text} ({_count_for_channel(counts, kind, index)})")
 
 # POSE 面板（来自第一份）
 class VIEW3D_PT_KeyframeCleanerPanel(Panel):
@@ -435,262 +1487,277 @@ class VIEW3D_PT_KeyframeCleanerPanel(Panel):
         box.label(text="2. 点击下方按钮删除选中项")
         box.label(text="（支持框选、间隔选中的关键帧）")
 
-        # 位置
         col = layout.column(align=True)
-        col.label(text="位置关键帧:", icon='ORIENTATION_LOCAL')
-        col.operator(POSE_OT_clear_location_all.bl_idname)
-        row = col.row(align=True)
-        row.operator(POSE_OT_clear_location_x.bl_idname)
-        row.operator(POSE_OT_clear_location_y.bl_idname)
-        row.operator(POSE_OT_clear_location_z.bl_idname)
-
-        # 旋转
-        col.separator()
-        col.label(text="旋转关键帧:", icon='ORIENTATION_GIMBAL')
-        col.operator(POSE_OT_clear_rot_quat_all.bl_idname)
-        row = col.row(align=True)
-        row.operator(POSE_OT_clear_rot_quat_w.bl_idname)
-        row.operator(POSE_OT_clear_rot_quat_x.bl_idname)
-        row.operator(POSE_OT_clear_rot_quat_y.bl_idname)
-        row.operator(POSE_OT_clear_rot_quat_z.bl_idname)
-
-        # 缩放
-        col.separator()
-        col.label(text="缩放关键帧:", icon='FULLSCREEN_ENTER')
-        col.operator(POSE_OT_clear_scale_all.bl_idname)
-        row = col.row(align=True)
-        row.operator(POSE_OT_clear_scale_x.bl_idname)
-        row.operator(POSE_OT_clear_scale_y.bl_idname)
-        row.operator(POSE_OT_clear_scale_z.bl_idname)
-
-# ------------------------------
-# --- 右键增强 Operators & Menus (来自第二份)
-# 使用通用 delete_selected_keyframes_auto 做桥接
-# ------------------------------
-# 位置 Operators (通用/多物体)
-class ANIM_OT_clean_loc_all(Operator):
-    bl_idname = "anim.clean_loc_all"
-    bl_label = "删除选中位置 · 全部XYZ"
-    bl_options = {"REGISTER", "UNDO"}
-    def execute(self, context):
-        n = delete_selected_keyframes_auto(context, kinds={"location"}, indices={0,1,2})
-        self.report({'INFO'}, f"已删除位置关键帧: {n}")
-        refresh_animation_views()
-        return {'FINISHED'}
+        for i, (title, icon, kind, count, all_text) in enumerate(POSE_PANEL_SECTIONS):
+            if i:
+                col.separator()
+            col.label(text=title, icon=icon)
+            _channel_op(col, kind, -1, all_text)
+            row = col.row(align=True)
+            for index in range(count):
+                _channel_op(row, kind, index, _channel_label(kind, index))
 
-class ANIM_OT_clean_loc_x(Operator):
-    bl_idname = "anim.clean_loc_x"
-    bl_label = "删除选中位置 · X"
-    bl_options = {"REGISTER", "UNDO"}
-    def execute(self, context):
-        n = delete_selected_keyframes_auto(context, kinds={"location"}, indices={0})
-        self.report({'INFO'}, f"已删除X位置关键帧: {n}")
-        refresh_animation_views()
-        return {'FINISHED'}
+        # 最近 N 次运行的统计
+        box = layout.box()
+        row = box.row()
+        row.label(text="最近运行统计:", icon='TIME')
+        row.operator(ANIM_OT_export_cleaner_stats.bl_idname, text="", icon='EXPORT')
+        runs = _run_history[-_get_stats_rows():]
+        if not runs:
+            box.label(text="（暂无记录）")
+        for run in reversed(runs):
+            col = box.column(align=True)
+            col.label(text=f"{run.operator}：删除 {run.keys_deleted}/{run.keys_inspected} 帧，"
+                           f"{run.curves_scanned} 条曲线，空曲线 {run.empty_curves_removed}")
+            col.label(text=f"  扫描 {run.scan_time * 1000.0:.1f} / 删除 {run.delete_time * 1000.0:.1f} / "
+                           f"刷新 {run.refresh_time * 1000.0:.1f} / 总计 {run.total_time * 1000.0:.1f} ms")
 
-class ANIM_OT_clean_loc_y(Operator):
-    bl_idname = "anim.clean_loc_y"
-    bl_label = "删除选中位置 · Y"
-    bl_options = {"REGISTER", "UNDO"}
-    def execute(self, context):
-        n = delete_selected_keyframes_auto(context, kinds={"location"}, indices={1})
-        self.report({'INFO'}, f"已删除Y位置关键帧: {n}")
-        refresh_animation_views()
-        return {'FINISHED'}
+# 批量清除：多个通道/分量一次完成，只产生一个撤销步骤
+CHANNEL_SPEC_ITEMS = [
+    ('LOC_X', "X位置", "", 1 << 0),
+    ('LOC_Y', "Y位置", "", 1 << 1),
+    ('LOC_Z', "Z位置", "", 1 << 2),
+    ('ROTE_X', "Euler X", "", 1 << 3),
+    ('ROTE_Y', "Euler Y", "", 1 << 4),
+    ('ROTE_Z', "Euler Z", "", 1 << 5),
+    ('ROTQ_W', "Quat W", "", 1 << 6),
+    ('ROTQ_X', "Quat X", "", 1 << 7),
+    ('ROTQ_Y', "Quat Y", "", 1 << 8),
+    ('ROTQ_Z', "Quat Z", "", 1 << 9),
+    ('SCALE_X', "X缩放", "", 1 << 10),
+    ('SCALE_Y', "Y缩放", "", 1 << 11),
+    ('SCALE_Z', "Z缩放", "", 1 << 12),
+]
 
-class ANIM_OT_clean_loc_z(Operator):
-    bl_idname = "anim.clean_loc_z"
-    bl_label = "删除选中位置 · Z"
-    bl_options = {"REGISTER", "UNDO"}
-    def execute(self, context):
-        n = delete_selected_keyframes_auto(context, kinds={"location"}, indices={2})
-        self.report({'INFO'}, f"已删除Z位置关键帧: {n}")
-        refresh_animation_views()
-        return {'FINISHED'}
+# 通道规格 -> (kind, array_index)
+CHANNEL_SPECS = {
+    'LOC_X': ("location", 0), 'LOC_Y': ("location", 1), 'LOC_Z': ("location", 2),
+    'ROTE_X': ("rotation_euler", 0), 'ROTE_Y': ("rotation_euler", 1), 'ROTE_Z': ("rotation_euler", 2),
+    'ROTQ_W': ("rotation_quaternion", 0), 'ROTQ_X': ("rotation_quaternion", 1),
+    'ROTQ_Y': ("rotation_quaternion", 2), 'ROTQ_Z': ("rotation_quaternion", 3),
+    'SCALE_X': ("scale", 0), 'SCALE_Y': ("scale", 1), 'SCALE_Z': ("scale", 2),
+}
 
-# 缩放 Operators
-class ANIM_OT_clean_scale_all(Operator):
-    bl_idname = "anim.clean_scale_all"
-    bl_label = "删除选中缩放 · 全部XYZ"
-    bl_options = {"REGISTER", "UNDO"}
-    def execute(self, context):
-        n = delete_selected_keyframes_auto(context, kinds={"scale"}, indices={0,1,2})
-        self.report({'INFO'}, f"已删除缩放关键帧: {n}")
-        refresh_animation_views()
-        return {'FINISHED'}
+def channel_specs_to_indices(specs):
+    """把通道规格集合转换为 {kind: {array_index, ...}}，可直接作为 indices 传入删除函数"""
+    per_kind = {}
+    for spec in specs:
+        kind, index = CHANNEL_SPECS[spec]
+        per_kind.setdefault(kind, set()).add(index)
+    return per_kind
 
-class ANIM_OT_clean_scale_x(Operator):
-    bl_idname = "anim.clean_scale_x"
-    bl_label = "删除选中缩放 · X"
+class ANIM_OT_clean_checked_channels(Operator):
+    bl_idname = "anim.clean_checked_channels"
+    bl_label = "清除勾选通道"
+    bl_description = "一次删除所有勾选通道/分量上的选中关键帧，只产生一个撤销步骤"
     bl_options = {"REGISTER", "UNDO"}
-    def execute(self, context):
-        n = delete_selected_keyframes_auto(context, kinds={"scale"}, indices={0})
-        self.report({'INFO'}, f"已删除X缩放关键帧: {n}")
-        refresh_animation_views()
-        return {'FINISHED'}
 
-class ANIM_OT_clean_scale_y(Operator):
-    bl_idname = "anim.clean_scale_y"
-    bl_label = "删除选中缩放 · Y"
-    bl_options = {"REGISTER", "UNDO"}
-    def execute(self, context):
-        n = delete_selected_keyframes_auto(context, kinds={"scale"}, indices={1})
-        self.report({'INFO'}, f"已删除Y缩放关键帧: {n}")
-        refresh_animation_views()
-        return {'FINISHED'}
+    channels: bpy.props.EnumProperty(
+        name="通道",
+        items=CHANNEL_SPEC_ITEMS,
+        options={'ENUM_FLAG'},
+        default={'LOC_X', 'LOC_Y', 'LOC_Z'},
+    )
 
-class ANIM_OT_clean_scale_z(Operator):
-    bl_idname = "anim.clean_scale_z"
-    bl_label = "删除选中缩放 · Z"
-    bl_options = {"REGISTER", "UNDO"}
-    def execute(self, context):
-        n = delete_selected_keyframes_auto(context, kinds={"scale"}, indices={2})
-        self.report({'INFO'}, f"已删除Z缩放关键帧: {n}")
-        refresh_animation_views()
-        return {'FINISHED'}
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
 
-# 旋转 Operators（自动支持 Euler/Quat）
-class ANIM_OT_clean_rot_auto_all(Operator):
-    bl_idname = "anim.clean_rot_auto_all"
-    bl_label = "删除选中旋转 · 全部(Euler/Quat)"
-    bl_options = {"REGISTER", "UNDO"}
-    def execute(self, context):
-        n = delete_selected_keyframes_auto(context, kinds={"rotation_euler", "rotation_quaternion"}, indices=None)
-        self.report({'INFO'}, f"已删除旋转关键帧: {n}")
-        refresh_animation_views()
-        return {'FINISHED'}
+    def draw(self, context):
+        layout = self.layout
+        col = layout.column(align=True)
+        for prefix in ("LOC_", "ROTE_", "ROTQ_", "SCALE_"):
+            row = col.row(align=True)
+            for ident, _name, _desc, _value in CHANNEL_SPEC_ITEMS:
+                if ident.startswith(prefix):
+                    row.prop_enum(self, "channels", ident)
 
-# Euler
-class ANIM_OT_clean_rote_x(Operator):
-    bl_idname = "anim.clean_rote_x"
-    bl_label = "删除Euler X旋转"
-    bl_options = {"REGISTER", "UNDO"}
+    @_record_run
     def execute(self, context):
-        n = delete_selected_keyframes_auto(context, kinds={"rotation_euler"}, indices={0})
-        self.report({'INFO'}, f"已删除Euler X旋转关键帧: {n}")
+        if not self.channels:
+            self.report({'WARNING'}, "未勾选任何通道")
+            return {'CANCELLED'}
+        per_kind = channel_specs_to_indices(self.channels)
+        per_channel, per_action = {}, {}
+        n = delete_selected_keyframes_auto(context, kinds=set(per_kind), indices=per_kind,
+                                           per_channel=per_channel, per_action=per_action)
+        detail = _format_report_detail(per_channel, per_action)
+        self.report({'INFO'}, f"已删除勾选通道关键帧: {n}{detail}")
         refresh_animation_views()
         return {'FINISHED'}
 
-class ANIM_OT_clean_rote_y(Operator):
-    bl_idname = "anim.clean_rote_y"
-    bl_label = "删除Euler Y旋转"
+class ANIM_OT_clean_redundant_keys(Operator):
+    bl_idname = "anim.clean_redundant_keys"
+    bl_label = "精简冗余关键帧"
+    bl_description = "删除不携带信息的关键帧：静止段、落在前后帧连线上的线性段，以及整段不变的常量通道"
     bl_options = {"REGISTER", "UNDO"}
-    def execute(self, context):
-        n = delete_selected_keyframes_auto(context, kinds={"rotation_euler"}, indices={1})
-        self.report({'INFO'}, f"已删除Euler Y旋转关键帧: {n}")
-        refresh_animation_views()
-        return {'FINISHED'}
 
-class ANIM_OT_clean_rote_z(Operator):
-    bl_idname = "anim.clean_rote_z"
-    bl_label = "删除Euler Z旋转"
-    bl_options = {"REGISTER", "UNDO"}
-    def execute(self, context):
-        n = delete_selected_keyframes_auto(context, kinds={"rotation_euler"}, indices={2})
-        self.report({'INFO'}, f"已删除Euler Z旋转关键帧: {n}")
-        refresh_animation_views()
-        return {'FINISHED'}
+    channels: bpy.props.EnumProperty(
+        name="通道",
+        items=CHANNEL_SPEC_ITEMS,
+        options={'ENUM_FLAG'},
+        default={spec for spec, _name, _desc, _value in CHANNEL_SPEC_ITEMS},
+    )
+    tolerance: bpy.props.FloatProperty(
+        name="容差",
+        description="关键帧偏离前后帧连线不超过该值即视为冗余",
+        default=0.001,
+        min=0.0,
+        soft_max=0.1,
+        precision=4,
+    )
+    collapse_constant: bpy.props.BoolProperty(
+        name="常量通道只保留一帧",
+        default=True,
+    )
 
-# Quaternion
-class ANIM_OT_clean_rotq_all(Operator):
-    bl_idname = "anim.clean_rotq_all"
-    bl_label = "删除Quat WXYZ旋转"
-    bl_options = {"REGISTER", "UNDO"}
+    @_record_run
     def execute(self, context):
-        n = delete_selected_keyframes_auto(context, kinds={"rotation_quaternion"}, indices={0,1,2,3})
-        self.report({'INFO'}, f"已删除四元数旋转关键帧: {n}")
+        if np is None:
+            self.report({'ERROR'}, "精简冗余关键帧需要 NumPy")
+            return {'CANCELLED'}
+        if not self.channels:
+            self.report({'WARNING'}, "未勾选任何通道")
+            return {'CANCELLED'}
+        per_kind = channel_specs_to_indices(self.channels)
+        total = 0
+        curves = 0
+        for action, _slot, matches, users in _collect_target_fcurves(context, kinds=set(per_kind), indices=per_kind):
+            removed_in_action = 0
+            for fc, _kind in matches:
+                removed = decimate_redundant_keyframes(fc, self.tolerance, self.collapse_constant)
+                if removed:
+                    removed_in_action += removed
+                    curves += 1
+            if removed_in_action:
+                _mark_touched(action, *users)
+            total += removed_in_action
+        self.report({'INFO'}, f"已精简冗余关键帧: {total}（涉及 {curves} 条曲线）")
         refresh_animation_views()
         return {'FINISHED'}
 
-class ANIM_OT_clean_rotq_w(Operator):
-    bl_idname = "anim.clean_rotq_w"
-    bl_label = "删除Quat W"
+class ANIM_OT_sweep_file_keyframes(Operator):
+    bl_idname = "anim.sweep_file_keyframes"
+    bl_label = "全文件关键帧清理"
+    bl_description = "遍历文件中所有 action（含 NLA、形态键、材质/灯光/相机、节点树），每个 action 只处理一次"
     bl_options = {"REGISTER", "UNDO"}
-    def execute(self, context):
-        n = delete_selected_keyframes_auto(context, kinds={"rotation_quaternion"}, indices={0})
-        self.report({'INFO'}, f"已删除Quat W旋转关键帧: {n}")
-        refresh_animation_views()
-        return {'FINISHED'}
 
-class ANIM_OT_clean_rotq_x(Operator):
-    bl_idname = "anim.clean_rotq_x"
-    bl_label = "删除Quat X"
-    bl_options = {"REGISTER", "UNDO"}
-    def execute(self, context):
-        n = delete_selected_keyframes_auto(context, kinds={"rotation_quaternion"}, indices={1})
-        self.report({'INFO'}, f"已删除Quat X旋转关键帧: {n}")
-        refresh_animation_views()
-        return {'FINISHED'}
+    operation: bpy.props.EnumProperty(
+        name="操作",
+        items=SWEEP_OPERATION_ITEMS,
+        default='SELECTED',
+    )
+    all_channels: bpy.props.BoolProperty(
+        name="所有通道",
+        description="勾选：处理任意 data_path 的曲线；不勾选：只处理下方勾选的变换通道。"
+                    "精简冗余关键帧时始终跳过阶梯插值与布尔/整数/枚举属性的曲线",
+        default=False,
+    )
+    channels: bpy.props.EnumProperty(
+        name="通道",
+        items=CHANNEL_SPEC_ITEMS,
+        options={'ENUM_FLAG'},
+        default={spec for spec, _name, _desc, _value in CHANNEL_SPEC_ITEMS},
+    )
+    tolerance: bpy.props.FloatProperty(
+        name="容差",
+        default=0.001,
+        min=0.0,
+        soft_max=0.1,
+        precision=4,
+    )
+    collapse_constant: bpy.props.BoolProperty(
+        name="常量通道只保留一帧",
+        default=True,
+    )
 
-class ANIM_OT_clean_rotq_y(Operator):
-    bl_idname = "anim.clean_rotq_y"
-    bl_label = "删除Quat Y"
-    bl_options = {"REGISTER", "UNDO"}
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, "operation")
+        layout.prop(self, "all_channels")
+        if not self.all_channels:
+            layout.prop(self, "channels")
+        if self.operation == 'REDUNDANT':
+            layout.prop(self, "tolerance")
+            layout.prop(self, "collapse_constant")
+
+    @_record_run
     def execute(self, context):
-        n = delete_selected_keyframes_auto(context, kinds={"rotation_quaternion"}, indices={2})
-        self.report({'INFO'}, f"已删除Quat Y旋转关键帧: {n}")
+        if self.operation == 'REDUNDANT' and np is None:
+            self.report({'ERROR'}, "精简冗余关键帧需要 NumPy")
+            return {'CANCELLED'}
+        if self.all_channels:
+            kinds = indices = None
+        else:
+            indices = channel_specs_to_indices(self.channels)
+            kinds = set(indices)
+        report = sweep_file_actions(self.operation, kinds=kinds, indices=indices,
+                                    tolerance=self.tolerance, collapse_constant=self.collapse_constant)
+        for name, users, removed in report:
+            print(f"[关键帧清除] {name}: 删除 {removed}，使用者: {', '.join(users) or '（无，孤立 action）'}")
+        total = sum(removed for _name, _users, removed in report)
+        self.report({'INFO'}, f"全文件清理完成：{len(report)} 个 action，共删除 {total} 个关键帧（明细见控制台）")
         refresh_animation_views()
         return {'FINISHED'}
 
-class ANIM_OT_clean_rotq_z(Operator):
-    bl_idname = "anim.clean_rotq_z"
-    bl_label = "删除Quat Z"
-    bl_options = {"REGISTER", "UNDO"}
+class ANIM_OT_export_cleaner_stats(Operator):
+    bl_idname = "anim.export_cleaner_stats"
+    bl_label = "导出运行统计 (CSV)"
+    bl_description = "把最近的运行统计（计数与扫描/删除/刷新耗时）导出为 CSV"
+
+    filepath: bpy.props.StringProperty(subtype='FILE_PATH')
+    filename_ext = ".csv"
+    filter_glob: bpy.props.StringProperty(default="*.csv", options={'HIDDEN'})
+
+    def invoke(self, context, event):
+        if not self.filepath:
+            self.filepath = "keyframe_cleaner_stats.csv"
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
     def execute(self, context):
-        n = delete_selected_keyframes_auto(context, kinds={"rotation_quaternion"}, indices={3})
-        self.report({'INFO'}, f"已删除Quat Z旋转关键帧: {n}")
-        refresh_animation_views()
+        if not _run_history:
+            self.report({'WARNING'}, "暂无运行记录")
+            return {'CANCELLED'}
+        try:
+            count = export_run_history_csv(bpy.path.abspath(self.filepath))
+        except OSError as exc:
+            self.report({'ERROR'}, f"导出失败: {exc}")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"已导出 {count} 条运行记录: {self.filepath}")
         return {'FINISHED'}
 
-# 菜单（右键增强）
+# 菜单（右键增强）：菜单项由 CHANNEL_MENU_ROWS 数据表生成
 class ANIM_MT_clean_location(Menu):
     bl_label = "位置关键帧清除"
     def draw(self, context):
-        layout = self.layout
-        layout.operator(ANIM_OT_clean_loc_all.bl_idname, text="全部XYZ位置")
-        layout.separator()
-        layout.operator(ANIM_OT_clean_loc_x.bl_idname, text="X位置")
-        layout.operator(ANIM_OT_clean_loc_y.bl_idname, text="Y位置")
-        layout.operator(ANIM_OT_clean_loc_z.bl_idname, text="Z位置")
+        _draw_channel_rows(self.layout, CHANNEL_MENU_ROWS['LOCATION'], _selected_key_counts(context))
 
 class ANIM_MT_clean_rotation(Menu):
     bl_label = "旋转关键帧清除"
     def draw(self, context):
-        layout = self.layout
-        obj = context.object
-        # 判断是否为骨骼姿态模式
-        is_pose_mode = obj and obj.type == 'ARMATURE' and context.mode == 'POSE'
-        
-        # 物体模式显示Euler旋转
-        if not is_pose_mode:
-            layout.label(text="Euler旋转")
-            layout.separator()
-            layout.operator(ANIM_OT_clean_rot_auto_all.bl_idname, text="全部Euler旋转")
-            layout.separator()
-            layout.operator(ANIM_OT_clean_rote_x.bl_idname, text="X旋转")
-            layout.operator(ANIM_OT_clean_rote_y.bl_idname, text="Y旋转")
-            layout.operator(ANIM_OT_clean_rote_z.bl_idname, text="Z旋转")
-        
-        # 骨骼姿态模式显示Quaternion四元数
-        else:
-            layout.label(text="Quaternion四元数")
-            layout.separator()
-            layout.operator(ANIM_OT_clean_rotq_all.bl_idname, text="全部WXYZ四元数")
-            layout.separator()
-            layout.operator(ANIM_OT_clean_rotq_w.bl_idname, text="W值")
-            layout.operator(ANIM_OT_clean_rotq_x.bl_idname, text="X值")
-            layout.operator(ANIM_OT_clean_rotq_y.bl_idname, text="Y值")
-            layout.operator(ANIM_OT_clean_rotq_z.bl_idname, text="Z值")
+        # 骨骼姿态模式显示Quaternion四元数，物体模式显示Euler旋转
+        is_pose_mode = _is_pose_context(context)
+        _draw_channel_rows(self.layout, CHANNEL_MENU_ROWS['ROTATION_QUAT' if is_pose_mode else 'ROTATION_EULER'],
+                           _selected_key_counts(context))
 
 class ANIM_MT_clean_scale(Menu):
     bl_label = "缩放关键帧清除"
+    def draw(self, context):
+        _draw_channel_rows(self.layout, CHANNEL_MENU_ROWS['SCALE'], _selected_key_counts(context))
+
+class ANIM_MT_clean_redundant(Menu):
+    bl_label = "精简冗余关键帧"
     def draw(self, context):
         layout = self.layout
-        layout.operator(ANIM_OT_clean_scale_all.bl_idname, text="全部XYZ缩放")
+        op = layout.operator(ANIM_OT_clean_redundant_keys.bl_idname, text="全部通道")
+        op.channels = set(CHANNEL_SPECS)
         layout.separator()
-        layout.operator(ANIM_OT_clean_scale_x.bl_idname, text="X缩放")
-        layout.operator(ANIM_OT_clean_scale_y.bl_idname, text="Y缩放")
-        layout.operator(ANIM_OT_clean_scale_z.bl_idname, text="Z缩放")
+        for text, prefixes in (("位置", ("LOC_",)), ("旋转", ("ROTE_", "ROTQ_")), ("缩放", ("SCALE_",))):
+            op = layout.operator(ANIM_OT_clean_redundant_keys.bl_idname, text=text)
+            op.channels = {spec for spec in CHANNEL_SPECS if spec.startswith(prefixes)}
 
 def _draw_context_menu_block(self, context):
     layout = self.layout
@@ -700,6 +1767,9 @@ def _draw_context_menu_block(self, context):
     col.menu(ANIM_MT_clean_location.__name__, text="位置")
     col.menu(ANIM_MT_clean_rotation.__name__, text="旋转")
     col.menu(ANIM_MT_clean_scale.__name__, text="缩放")
+    col.operator(ANIM_OT_clean_checked_channels.bl_idname, text="清除勾选通道…")
+    col.menu(ANIM_MT_clean_redundant.__name__, text="精简冗余关键帧")
+    col.operator(ANIM_OT_sweep_file_keyframes.bl_idname, text="全文件关键帧清理…")
 
 # 右键（POSE 模式）扩展（来自第一份）
 def draw_pose_context_menu(self, context):
@@ -709,72 +1779,83 @@ def draw_pose_context_menu(self, context):
     layout.separator()
     layout.label(text="选中关键帧清除:")
     col = layout.column(align=True)
-    col.menu("POSE_MT_clear_location_menu", text="位置")
-    col.menu("POSE_MT_clear_rotation_menu", text="旋转")
-    col.menu("POSE_MT_clear_scale_menu", text="缩放")
+    col.menu(ANIM_MT_clean_location.__name__, text="位置")
+    col.menu(ANIM_MT_clean_rotation.__name__, text="旋转")
+    col.menu(ANIM_MT_clean_scale.__name__, text="缩放")
 
-# 为 POSE 菜单复用第一份的子菜单类名（将其加入注册）
-class POSE_MT_clear_location_menu(Menu):
-    bl_label = "位置关键帧清除"
-    def draw(self, context):
-        layout = self.layout
-        layout.operator(POSE_OT_clear_location_all.bl_idname)
-        layout.separator()
-        layout.operator(POSE_OT_clear_location_x.bl_idname)
-        layout.operator(POSE_OT_clear_location_y.bl_idname)
-        layout.operator(POSE_OT_clear_location_z.bl_idname)
+# ------------------------------
+# 插件偏好设置
+# ------------------------------
+class KeyframeCleanerPreferences(AddonPreferences):
+    bl_idname = __name__
 
-class POSE_MT_clear_rotation_menu(Menu):
-    bl_label = "旋转关键帧清除"
-    def draw(self, context):
-        layout = self.layout
-        layout.operator(POSE_OT_clear_rot_quat_all.bl_idname)
-        layout.separator()
-        layout.operator(POSE_OT_clear_rot_quat_w.bl_idname)
-        layout.operator(POSE_OT_clear_rot_quat_x.bl_idname)
-        layout.operator(POSE_OT_clear_rot_quat_y.bl_idname)
-        layout.operator(POSE_OT_clear_rot_quat_z.bl_idname)
+    refresh_mode: bpy.props.EnumProperty(
+        name="删除后刷新方式",
+        items=REFRESH_MODE_ITEMS,
+        default='TAG_ONLY',
+    )
+    chunked_delete: bpy.props.BoolProperty(
+        name="分块删除（可按 Esc 取消）",
+        description="菜单与面板中的通道删除改用 modal 分块版本，适合数百万关键帧的大动作",
+        default=False,
+    )
+    respect_editor_filters: bpy.props.BoolProperty(
+        name="遵循编辑器通道过滤",
+        description="从曲线编辑器/摄影表调用时，只处理通道列表中可见的曲线："
+                    "跳过曲线编辑器中隐藏的曲线，并遵循“仅显示选中”“仅显示错误”与搜索过滤",
+        default=False,
+    )
+    stats_rows: bpy.props.IntProperty(
+        name="面板显示的运行记录数",
+        default=5,
+        min=1,
+        max=_RUN_HISTORY_LIMIT,
+    )
 
-class POSE_MT_clear_scale_menu(Menu):
-    bl_label = "缩放关键帧清除"
     def draw(self, context):
         layout = self.layout
-        layout.operator(POSE_OT_clear_scale_all.bl_idname)
-        layout.separator()
-        layout.operator(POSE_OT_clear_scale_x.bl_idname)
-        layout.operator(POSE_OT_clear_scale_y.bl_idname)
-        layout.operator(POSE_OT_clear_scale_z.bl_idname)
+        layout.prop(self, "refresh_mode")
+        layout.prop(self, "chunked_delete")
+        layout.prop(self, "respect_editor_filters")
+        layout.prop(self, "stats_rows")
+        col = layout.column(align=True)
+        for ident, label, _desc in REFRESH_MODE_ITEMS:
+            elapsed = _refresh_timings.get(ident)
+            text = "—" if elapsed is None else f"{elapsed * 1000.0:.2f} ms"
+            col.label(text=f"最近一次刷新耗时（{label}）: {text}")
 
 # ------------------------------
 # 注册表
 # ------------------------------
 _classes = [
-    # POSE 专用（第一份）
-    POSE_OT_clear_location_all, POSE_OT_clear_location_x, POSE_OT_clear_location_y, POSE_OT_clear_location_z,
-    POSE_OT_clear_rot_quat_all, POSE_OT_clear_rot_quat_w, POSE_OT_clear_rot_quat_x, POSE_OT_clear_rot_quat_y, POSE_OT_clear_rot_quat_z,
-    POSE_OT_clear_scale_all, POSE_OT_clear_scale_x, POSE_OT_clear_scale_y, POSE_OT_clear_scale_z,
-    POSE_MT_clear_location_menu, POSE_MT_clear_rotation_menu, POSE_MT_clear_scale_menu,
+    KeyframeCleanerPreferences,
+    ANIM_OT_clean_channel_keys, ANIM_OT_clean_channel_keys_modal,
     VIEW3D_PT_KeyframeCleanerPanel,
-    # 右键增强（第二份）
-    ANIM_OT_clean_loc_all, ANIM_OT_clean_loc_x, ANIM_OT_clean_loc_y, ANIM_OT_clean_loc_z,
-    ANIM_OT_clean_scale_all, ANIM_OT_clean_scale_x, ANIM_OT_clean_scale_y, ANIM_OT_clean_scale_z,
-    ANIM_OT_clean_rot_auto_all,
-    ANIM_OT_clean_rote_x, ANIM_OT_clean_rote_y, ANIM_OT_clean_rote_z,
-    ANIM_OT_clean_rotq_all, ANIM_OT_clean_rotq_w, ANIM_OT_clean_rotq_x, ANIM_OT_clean_rotq_y, ANIM_OT_clean_rotq_z,
-    ANIM_MT_clean_location, ANIM_MT_clean_rotation, ANIM_MT_clean_scale
+    ANIM_OT_clean_checked_channels, ANIM_OT_clean_redundant_keys, ANIM_OT_sweep_file_keyframes,
+    ANIM_OT_export_cleaner_stats,
+    ANIM_MT_clean_location, ANIM_MT_clean_rotation, ANIM_MT_clean_scale, ANIM_MT_clean_redundant
 ]
 
+# 最近一次 register() 耗时（秒）
+_registration_seconds = None
+
 def register():
-    # 防止重复注册尝试清理
-    try:
-        unregister()
-    except Exception:
-        pass
+    global _registration_seconds
+    start = time.perf_counter()
     for cls in _classes:
         try:
             register_class(cls)
         except Exception:
             print("注册类失败:", cls)
+    for name in _CACHE_CLEAR_HANDLERS:
+        handlers = getattr(bpy.app.handlers, name)
+        if _clear_channel_index_cache not in handlers:
+            handlers.append(_clear_channel_index_cache)
+    if _on_depsgraph_update_channel_index not in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.append(_on_depsgraph_update_channel_index)
+    if _resubscribe_selection_msgbus not in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.append(_resubscribe_selection_msgbus)
+    _subscribe_selection_msgbus()
     # 右键菜单挂载（Dope Sheet / Timeline / Graph）
     if hasattr(bpy.types, 'DOPESHEET_MT_context_menu'):
         bpy.types.DOPESHEET_MT_context_menu.append(_draw_context_menu_block)
@@ -785,7 +1866,8 @@ def register():
     # Pose 右键菜单挂载（3D视图 Pose 模式右键）
     if hasattr(bpy.types, 'VIEW3D_MT_pose_context_menu'):
         bpy.types.VIEW3D_MT_pose_context_menu.append(draw_pose_context_menu)
-    print("[关键帧清除 — 合并增强版] 已注册。")
+    _registration_seconds = time.perf_counter() - start
+    print(f"[关键帧清除 — 合并增强版] 已注册（{len(_classes)} 个类，耗时 {_registration_seconds * 1000.0:.2f} ms）。")
 
 def unregister():
     # 移除右键挂载
@@ -809,6 +1891,17 @@ def unregister():
             bpy.types.VIEW3D_MT_pose_context_menu.remove(draw_pose_context_menu)
     except Exception:
         pass
+    for name in _CACHE_CLEAR_HANDLERS:
+        handlers = getattr(bpy.app.handlers, name)
+        if _clear_channel_index_cache in handlers:
+            handlers.remove(_clear_channel_index_cache)
+    if _on_depsgraph_update_channel_index in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(_on_depsgraph_update_channel_index)
+    if _resubscribe_selection_msgbus in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(_resubscribe_selection_msgbus)
+    bpy.msgbus.clear_by_owner(_msgbus_owner)
+    _channel_index_cache.clear()
+    _selection_summary_cache.clear()
     for cls in reversed(_classes):
         try:
             unregister_class(cls)
@@ -816,5 +1909,260 @@ def unregister():
             pass
     print("[关键帧清除 — 合并增强版] 已卸载。")
 
+# ------------------------------
+# 命令行批处理
+#   blender --background --factory-startup --python 关键帧清除-右键增强.py -- batch \
+#       --files a.blend b.blend --kinds scale --workers 4 --output ./cleanup_logs
+# 协调进程为每个文件启动一个 Blender 工作进程（最多 --workers 个并行），
+# 每个工作进程删除后保存文件，并写出一份 JSON 汇总（删除数量、耗时）
+# ------------------------------
+def _build_cli_parser():
+    parser = argparse.ArgumentParser(prog="关键帧清除-右键增强", description="批量按通道清除 .blend 文件中的关键帧")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_filters(p):
+        p.add_argument("--kinds", nargs="+", choices=TRANSFORM_KINDS, required=True, help="要清理的通道")
+        p.add_argument("--indices", nargs="*", type=int, default=None, help="分量索引，省略表示全部")
+        p.add_argument("--selected-only", action="store_true", help="只删除文件中处于选中状态的关键帧")
+        p.add_argument("--no-save", action="store_true", help="只统计，不保存文件")
+
+    batch = sub.add_parser("batch", help="协调多个 Blender 工作进程处理一批文件")
+    batch.add_argument("--files", nargs="+", required=True)
+    batch.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    batch.add_argument("--output", default="keyframe_cleanup_logs", help="JSON 汇总输出目录")
+    batch.add_argument("--timeout", type=float, default=None, help="单个文件的超时（秒）")
+    add_filters(batch)
+
+    worker = sub.add_parser("worker", help="在当前打开的文件中执行清理（由 batch 调用）")
+    worker.add_argument("--json", required=True, help="JSON 汇总输出路径")
+    add_filters(worker)
+
+    bench = sub.add_parser("bench", help="用合成骨骼/物体动画测量热点函数耗时")
+    bench.add_argument("--bones", type=int, default=200, help="合成骨架的骨骼数")
+    bench.add_argument("--objects", type=int, default=50, help="合成动画物体数")
+    bench.add_argument("--keys", type=int, default=1000, help="每条曲线的关键帧数")
+    bench.add_argument("--selection", type=float, default=0.3, help="关键帧被选中的比例 0~1")
+    bench.add_argument("--channels", nargs="+", choices=TRANSFORM_KINDS,
+                       default=["location", "rotation_quaternion", "scale"], help="每个骨骼/物体生成的通道")
+    bench.add_argument("--repeat", type=int, default=3)
+    bench.add_argument("--seed", type=int, default=0)
+    bench.add_argument("--output", default="keyframe_cleaner_bench.json")
+    return parser
+
+def _filter_args(args):
+    cmd = ["--kinds", *args.kinds]
+    if args.indices:
+        cmd += ["--indices", *map(str, args.indices)]
+    if args.selected_only:
+        cmd.append("--selected-only")
+    if args.no_save:
+        cmd.append("--no-save")
+    return cmd
+
+def _cli_worker(args):
+    start = time.perf_counter()
+    result = {
+        "file": bpy.data.filepath,
+        "kinds": args.kinds,
+        "indices": args.indices or None,
+        "selected_only": args.selected_only,
+    }
+    try:
+        indices = set(args.indices) if args.indices else None
+        actions = clean_keyframes_in_file(set(args.kinds), indices, selected_only=args.selected_only)
+        result["actions"] = actions
+        result["removed"] = sum(a["removed"] for a in actions.values())
+        result["saved"] = False
+        if result["removed"] and not args.no_save:
+            bpy.ops.wm.save_mainfile()
+            result["saved"] = True
+    except Exception as exc:
+        result["error"] = repr(exc)
+    result["seconds"] = time.perf_counter() - start
+    with open(args.json, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    return 1 if "error" in result else 0
+
+def _cli_batch(args):
+    os.makedirs(args.output, exist_ok=True)
+    script = os.path.abspath(__file__)
+    filters = _filter_args(args)
+
+    def run_one(item):
+        i, blend = item
+        stem = os.path.splitext(os.path.basename(blend))[0]
+        json_path = os.path.join(args.output, f"{i:04d}_{stem}.json")
+        cmd = [bpy.app.binary_path, "--background", "--factory-startup", blend,
+               "--python", script, "--", "worker", "--json", json_path, *filters]
+        start = time.perf_counter()
+        try:
+            proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, timeout=args.timeout)
+            returncode = proc.returncode
+        except subprocess.TimeoutExpired:
+            returncode = None
+        entry = {"file": blend, "json": json_path, "returncode": returncode,
+                 "seconds": time.perf_counter() - start}
+        try:
+            with open(json_path, encoding="utf-8") as f:
+                entry["removed"] = json.load(f).get("removed")
+        except (OSError, ValueError):
+            entry["removed"] = None
+        print(f"[关键帧清除] {blend}: 删除 {entry['removed']}，返回码 {returncode}")
+        return entry
+
+    # 每个线程只负责等待一个 Blender 子进程，实际并行发生在子进程中
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        entries = list(pool.map(run_one, enumerate(args.files)))
+
+    summary_path = os.path.join(args.output, "summary.json")
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump({"files": entries, "removed": sum(e["removed"] or 0 for e in entries)},
+                  f, ensure_ascii=False, indent=2)
+    print(f"[关键帧清除] 汇总已写入: {summary_path}")
+    return 0 if all(e["returncode"] == 0 for e in entries) else 1
+
+# ------------------------------
+# 基准测试
+#   blender --background --factory-startup --python 关键帧清除-右键增强.py -- bench \
+#       --bones 200 --objects 50 --keys 1000 --selection 0.3 --output bench.json
+# 每轮重新生成合成数据（删除是破坏性的），结果写入 JSON 便于对比不同版本
+# ------------------------------
+_CHANNEL_SIZES = {"location": 3, "rotation_euler": 3, "rotation_quaternion": 4, "scale": 3}
+
+def _bench_new_fcurve(action, id_data, data_path, index, group):
+    # Blender 4.4+ 分层 action 通过 fcurve_ensure_for_datablock 建在已分配的 slot 下
+    if hasattr(action, "fcurve_ensure_for_datablock"):
+        return action.fcurve_ensure_for_datablock(id_data, data_path, index=index, group_name=group)
+    return action.fcurves.new(data_path, index=index, action_group=group)
+
+def _bench_fill_fcurve(fcurve, keys, selection, rng):
+    kps = fcurve.keyframe_points
+    kps.add(keys)
+    co = []
+    for frame in range(keys):
+        co += (float(frame), rng.uniform(-1.0, 1.0))
+    kps.foreach_set("co", co)
+    kps.foreach_set("select_control_point", [rng.random() < selection for _ in range(keys)])
+    fcurve.update()
+
+def _bench_build_scene(args, rng):
+    """生成一个带 args.bones 根骨骼的骨架与 args.objects 个动画物体，返回 (armature, objects)"""
+    scene = bpy.context.scene
+    arm_data = bpy.data.armatures.new("KCBench_Rig")
+    armature = bpy.data.objects.new("KCBench_Rig", arm_data)
+    scene.collection.objects.link(armature)
+    bpy.context.view_layer.objects.active = armature
+    bpy.ops.object.mode_set(mode='EDIT')
+    for i in range(args.bones):
+        eb = arm_data.edit_bones.new(f"bone_{i:04d}")
+        eb.head = (i * 0.1, 0.0, 0.0)
+        eb.tail = (i * 0.1, 0.0, 0.1)
+    bpy.ops.object.mode_set(mode='OBJECT')
+
+    action = bpy.data.actions.new("KCBench_RigAction")
+    armature.animation_data_create().action = action
+    for pb in armature.pose.bones:
+        for kind in args.channels:
+            for index in range(_CHANNEL_SIZES[kind]):
+                fc = _bench_new_fcurve(action, armature, f'pose.bones["{pb.name}"].{kind}', index, pb.name)
+                _bench_fill_fcurve(fc, args.keys, args.selection, rng)
+
+    objects = []
+    for i in range(args.objects):
+        ob = bpy.data.objects.new(f"KCBench_Obj_{i:04d}", None)
+        scene.collection.objects.link(ob)
+        action = bpy.data.actions.new(f"KCBench_ObjAction_{i:04d}")
+        ob.animation_data_create().action = action
+        for kind in args.channels:
+            for index in range(_CHANNEL_SIZES[kind]):
+                fc = _bench_new_fcurve(action, ob, kind, index, "Object Transforms")
+                _bench_fill_fcurve(fc, args.keys, args.selection, rng)
+        objects.append(ob)
+    return armature, objects
+
+def _bench_clear_scene(armature, objects):
+    for ob in [armature, *objects]:
+        action = ob.animation_data.action if ob.animation_data else None
+        data = ob.data
+        bpy.data.objects.remove(ob)
+        if action:
+            bpy.data.actions.remove(action)
+        if data:
+            bpy.data.armatures.remove(data)
+    _channel_index_cache.clear()
+    _touched_ids.clear()
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+def _cli_bench(args):
+    rng = random.Random(args.seed)
+    kinds = set(args.channels)
+    runs = {name: [] for name in (
+        "get_selected_keyframes",
+        "delete_selected_keyframes_for_armature",
+        "_delete_selected_keyframes_for_objects",
+        "refresh_animation_views[TAG_ONLY]",
+        "refresh_animation_views[FULL]",
+        "register",
+        "unregister",
+    )}
+    for _ in range(max(1, args.repeat)):
+        armature, objects = _bench_build_scene(args, rng)
+        context = types.SimpleNamespace(selected_objects=objects, active_object=objects[0] if objects else None)
+        runs["get_selected_keyframes"].append(_timed(get_selected_keyframes, armature))
+        runs["delete_selected_keyframes_for_armature"].append(
+            _timed(delete_selected_keyframes_for_armature, armature, armature.pose.bones, kinds, None))
+        runs["_delete_selected_keyframes_for_objects"].append(
+            _timed(_delete_selected_keyframes_for_objects, context, kinds=kinds, indices=None))
+        touched = set(_touched_ids)
+        runs["refresh_animation_views[TAG_ONLY]"].append(_timed(refresh_animation_views, 'TAG_ONLY'))
+        _touched_ids.update(touched)
+        runs["refresh_animation_views[FULL]"].append(_timed(refresh_animation_views, 'FULL'))
+        _bench_clear_scene(armature, objects)
+        runs["register"].append(_timed(register))
+        runs["unregister"].append(_timed(unregister))
+
+    curves_per_owner = sum(_CHANNEL_SIZES[k] for k in args.channels)
+    report = {
+        "blender": bpy.app.version_string,
+        "addon_version": list(bl_info["version"]),
+        "numpy": np is not None,
+        "config": {
+            "bones": args.bones,
+            "objects": args.objects,
+            "curves_per_owner": curves_per_owner,
+            "keys_per_curve": args.keys,
+            "selection": args.selection,
+            "channels": args.channels,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "results": {
+            name: {"min": min(times), "mean": sum(times) / len(times), "runs": times}
+            for name, times in runs.items()
+        },
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    for name, stats in report["results"].items():
+        print(f"[关键帧清除 bench] {name}: min {stats['min'] * 1000.0:.2f} ms, mean {stats['mean'] * 1000.0:.2f} ms")
+    print(f"[关键帧清除 bench] 结果已写入: {args.output}")
+    return 0
+
+def _cli_main(argv):
+    args = _build_cli_parser().parse_args(argv)
+    if args.command == "batch":
+        return _cli_batch(args)
+    if args.command == "bench":
+        return _cli_bench(args)
+    return _cli_worker(args)
+
 if __name__ == "__main__":
+    # 只有后台（--background）运行时才进入命令行模式；在界面会话中从文本编辑器运行时只注册插件，
+    # 避免解析启动参数里的 -- 脚本参数后 sys.exit() 关闭用户的 Blender
+    if bpy.app.background and "--" in sys.argv:
+        sys.exit(_cli_main(sys.argv[sys.argv.index("--") + 1:]))
     register()